@@ -0,0 +1,113 @@
+from hashlib import md5
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import (HttpResponse, HttpResponseNotAllowed,
+                         HttpResponseNotModified)
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.authentication import CachedTokenAuthentication
+from api.cache import (CACHE_PREFIX, cache_headers, content_etag,
+                       get_versions, is_not_modified)
+from api.ingredient_index import ingredient_index
+from api.renderers import SHOPPING_CART_RENDERERS
+from api.serializers import IngredientSearchSerializer, TagSerializer
+from api.shopping_cart import SHOPPING_CART_FORMATS, shopping_cart_items
+from recipes.models import Tag
+
+# Асинхронные версии читающих представлений для режима ASGI. Запросы
+# к базе и кешу в Django 3.2 синхронные и выполняются в потоке через
+# sync_to_async, а медленные клиенты обслуживает event loop без
+# занятия потока.
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type='application/json',
+        status=status
+    )
+
+
+def cached_json_response(request, versions, build):
+    # Те же версии, ETag и заголовки кеширования, что у CachedResponseMixin.
+    key = md5(':'.join((
+        request.build_absolute_uri(), *get_versions(versions)
+    )).encode()).hexdigest()
+    cached = cache.get(f'{CACHE_PREFIX}:async:{key}')
+    if cached is None:
+        content = JSONRenderer().render(build())
+        cached = content, content_etag(content)
+        cache.set(
+            f'{CACHE_PREFIX}:async:{key}', cached, settings.API_CACHE_TIMEOUT
+        )
+    content, etag = cached
+    if is_not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    return cache_headers(response, etag, settings.API_CACHE_MAX_AGE)
+
+
+async def tag_list(request):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(('GET',))
+    return await sync_to_async(cached_json_response)(
+        request, ('tags',),
+        lambda: TagSerializer(Tag.objects.all(), many=True).data
+    )
+
+
+async def ingredient_list(request):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(('GET',))
+    params = IngredientSearchSerializer(data=request.GET)
+    if not params.is_valid():
+        return json_response(params.errors, status=400)
+    return await sync_to_async(cached_json_response)(
+        request, ('ingredients',),
+        lambda: ingredient_index.search(**params.validated_data)
+    )
+
+
+def shopping_cart_response(request):
+    request = Request(
+        request,
+        authenticators=(CachedTokenAuthentication(),),
+        negotiator=DefaultContentNegotiation()
+    )
+    try:
+        if not request.user.is_authenticated:
+            raise NotAuthenticated
+        renderer, _ = request.negotiator.select_renderer(
+            request, [renderer() for renderer in SHOPPING_CART_RENDERERS]
+        )
+    except APIException as error:
+        response = json_response(
+            {'detail': error.detail}, status=error.status_code
+        )
+        if error.status_code == 401:
+            response['WWW-Authenticate'] = 'Token'
+        return response
+    # ASGI-обработчик Django 3.2 перебирает потоковый ответ прямо в event
+    # loop, где запросы к базе запрещены, поэтому файл собирается целиком.
+    response = HttpResponse(
+        SHOPPING_CART_FORMATS[renderer.format](
+            *shopping_cart_items(request.user)
+        ),
+        content_type=renderer.media_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="cart.{renderer.format}"'
+    )
+    return response
+
+
+async def download_shopping_cart(request):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(('GET',))
+    return await sync_to_async(shopping_cart_response)(request)
@@ -0,0 +1,71 @@
+from hashlib import sha256
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.cache import CACHE_PREFIX
+
+User = get_user_model()
+
+# Поля пользователя, которые читают представления и сериализаторы.
+USER_SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'avatar',
+    'is_active', 'is_staff', 'is_superuser'
+)
+
+
+def token_cache_key(key):
+    # Сам токен в ключ кеша не попадает.
+    return f'{CACHE_PREFIX}:token:{sha256(key.encode()).hexdigest()}'
+
+
+def user_snapshot(user):
+    # Значения приводятся к виду для базы: у аватара остается имя файла,
+    # а не FieldFile со ссылкой на пользователя вместе с паролем.
+    snapshot = {}
+    for name in USER_SNAPSHOT_FIELDS:
+        field = User._meta.get_field(name)
+        snapshot[name] = field.get_prep_value(getattr(user, field.attname))
+    return snapshot
+
+
+def user_from_snapshot(snapshot):
+    # Пароль и остальные поля остаются отложенными: обращение к ним
+    # подгружает их из базы, а save() пишет только загруженные поля.
+    fields = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in snapshot
+    ]
+    return User.from_db(
+        router.db_for_read(User), fields,
+        [snapshot[field] for field in fields]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    # В кеше хранится снимок пользователя токена без пароля, поэтому
+    # попадание обходится без запросов к базе. Снимок сбрасывается при
+    # сохранении пользователя и удалении токена; изменения через
+    # queryset.update() и сброс в кеше другого процесса (locmem)
+    # видны не позже AUTH_TOKEN_CACHE_TIMEOUT.
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(
+                cache_key, user_snapshot(user),
+                settings.AUTH_TOKEN_CACHE_TIMEOUT
+            )
+            return user, token
+        if not snapshot['is_active']:
+            cache.delete(cache_key)
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        user = user_from_snapshot(snapshot)
+        return user, self.get_model()(key=key, user=user)
@@ -0,0 +1,106 @@
+import argparse
+import os
+import random
+import time
+from itertools import islice
+
+# Сравнение фильтра рецептов по нескольким тегам: старый JOIN по
+# tags__slug (дублирует рецепты), тот же JOIN с DISTINCT и EXISTS из
+# RecipeFilterSet.filter_tags. Данные заполняются во временной тестовой
+# базе, рабочая база не затрагивается. Для каждого числа тегов
+# замеряются count() и одна страница со смещением --offset.
+#
+#   cd backend
+#   python -m api.benchmark --recipes 100000
+
+BATCH_SIZE = 5000
+PAGE_SIZE = 6
+
+
+def fill(recipes, tags, tags_per_recipe):
+    from django.contrib.auth import get_user_model
+
+    from recipes.models import Recipe, Tag
+
+    author = get_user_model().objects.create_user(
+        username='benchmark', email='benchmark@foodgram.ru'
+    )
+    tag_ids = [
+        Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}').id
+        for number in range(tags)
+    ]
+    items = (
+        Recipe(
+            author=author,
+            name=f'Рецепт {number}',
+            text='Описание',
+            image='recipes/images/recipe.png',
+            cooking_time=1
+        ) for number in range(recipes)
+    )
+    random.seed(0)
+    while batch := list(islice(items, BATCH_SIZE)):
+        Recipe.objects.bulk_create(batch)
+        first = Recipe.objects.order_by('-id')[len(batch) - 1].id
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in range(first, first + len(batch))
+            for tag_id in random.sample(tag_ids, tags_per_recipe)
+        )
+
+
+def variants(slugs):
+    from api.filters import RecipeFilterSet
+    from recipes.models import Recipe
+
+    recipes = Recipe.objects.all()
+    return {
+        'JOIN': recipes.filter(tags__slug__in=slugs),
+        'JOIN + DISTINCT': recipes.filter(tags__slug__in=slugs).distinct(),
+        'EXISTS': RecipeFilterSet(queryset=recipes).filter_tags(
+            recipes, 'tags', slugs
+        ),
+    }
+
+
+def measure(recipes, options):
+    best = None
+    for _ in range(options.repeat):
+        started = time.monotonic()
+        count = recipes.count()
+        list(recipes.values_list('id', flat=True)[
+            options.offset:options.offset + PAGE_SIZE
+        ])
+        elapsed = time.monotonic() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--tags', type=int, default=10)
+    parser.add_argument('--tags-per-recipe', type=int, default=3)
+    parser.add_argument('--offset', type=int, default=600)
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    import django
+    django.setup()
+    from django.db import connection
+
+    name = connection.creation.create_test_db(verbosity=0)
+    try:
+        fill(options.recipes, options.tags, options.tags_per_recipe)
+        for tags in (1, 3, 5):
+            slugs = [f'tag{number}' for number in range(tags)]
+            print(f'Тегов в запросе: {tags}')
+            for variant, recipes in variants(slugs).items():
+                elapsed, count = measure(recipes, options)
+                print(f'  {variant}: {elapsed:.0f} мс, найдено {count}')
+    finally:
+        connection.creation.destroy_test_db(name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
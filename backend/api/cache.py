@@ -0,0 +1,123 @@
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework.response import Response
+
+from recipes.models import Tag
+
+CACHE_PREFIX = 'api'
+
+
+def version_key(name):
+    return f'{CACHE_PREFIX}:version:{name}'
+
+
+def get_versions(names):
+    keys = [version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Версия из другого процесса могла появиться раньше нас,
+            # add не перезапишет ее.
+            cache.add(key, uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*names):
+    cache.set_many(
+        {version_key(name): uuid4().hex for name in names}, timeout=None
+    )
+
+
+def get_tag_ids_by_slug():
+    key = f'{CACHE_PREFIX}:tag_slugs:{get_versions(("tags",))[0]}'
+    tag_ids = cache.get(key)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_ids, settings.API_CACHE_TIMEOUT)
+    return tag_ids
+
+
+def content_etag(content):
+    # ETag считается по самому ответу: версии данных хранятся в кеше
+    # процесса и у разных процессов могут расходиться, а содержимое нет.
+    return f'"{md5(content).hexdigest()}"'
+
+
+def is_not_modified(request, etag):
+    if_none_match = request.headers.get('If-None-Match', '')
+    return etag in if_none_match or if_none_match == '*'
+
+
+def cache_headers(response, etag, max_age):
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class CachedResponseMixin:
+    # Версии данных, от которых зависит ответ. Меняются сигналами
+    # моделей, после чего старые ключи кеша становятся неактуальны.
+    cache_versions = ()
+    cache_anonymous_only = False
+    cache_max_age = settings.API_CACHE_MAX_AGE
+    cache_timeout = settings.API_CACHE_TIMEOUT
+    cache_key = None
+
+    def get_cache_key(self, request):
+        # Ответы содержат абсолютные ссылки, поэтому в ключ входят схема
+        # и адрес сервера из запроса.
+        return md5(':'.join((
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+            *get_versions(self.cache_versions)
+        )).encode()).hexdigest()
+
+    def cached(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json' or (
+            self.cache_anonymous_only and request.user.is_authenticated
+        ):
+            return handler(request, *args, **kwargs)
+        self.cache_key = self.get_cache_key(request)
+        cached = cache.get(f'{CACHE_PREFIX}:response:{self.cache_key}')
+        if cached is None:
+            return handler(request, *args, **kwargs)
+        content, content_type, etag = cached
+        if is_not_modified(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.cache_key is None or response.status_code not in (200, 304):
+            return response
+        if isinstance(response, Response):
+            response.render()
+            etag = content_etag(response.content)
+            cache.set(
+                f'{CACHE_PREFIX}:response:{self.cache_key}',
+                (response.content, response['Content-Type'], etag),
+                self.cache_timeout
+            )
+            if is_not_modified(request, etag):
+                response = HttpResponseNotModified()
+        else:
+            etag = response['ETag']
+        return cache_headers(response, etag, self.cache_max_age)
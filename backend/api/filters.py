@@ -1,22 +1,46 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from api.cache import get_tag_ids_by_slug
+from recipes.models import Recipe
+
+
+def tag_choices():
+    return [(slug, slug) for slug in get_tag_ids_by_slug()]
 
 
 class RecipeFilterSet(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all()
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='filter_tags'
     )
+    search = filters.CharFilter(method='filter_search')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'popular'),),
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'author', 'search', 'is_favorited', 'is_in_shopping_cart',
+            'ordering'
+        )
+
+    def filter_tags(self, recipes, name, slugs):
+        tag_ids = get_tag_ids_by_slug()
+        return recipes.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'),
+            tag_id__in=[tag_ids[slug] for slug in slugs if slug in tag_ids]
+        )))
+
+    def filter_search(self, recipes, name, query):
+        # Найденные рецепты упорядочены по релевантности.
+        return recipes.search(query)
 
     def filter_is_favorited(self, recipes, name, value):
         user = self.request.user
@@ -32,10 +56,6 @@ class RecipeFilterSet(FilterSet):
                 return recipes.filter(shopingcarts__user=user)
         return recipes
 
-
-class IngredientFilterSet(FilterSet):
-    name = filters.CharFilter(lookup_expr='istartswith')
-
-    class Meta:
-        model = Ingredient
-        fields = ('name',)
+    def filter_ordering(self, recipes, name, value):
+        # Порядок совпадает с индексом recipe_popular_idx.
+        return recipes.order_by('-favorites_count', '-pub_date', '-id')
@@ -0,0 +1,64 @@
+from bisect import bisect_left
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+
+from recipes.models import Ingredient
+
+
+# Отсортированный по названию снимок продуктов в памяти процесса.
+# Строится при первом обращении и перестраивается после изменения
+# продуктов в этом процессе либо по истечении INGREDIENT_INDEX_TTL секунд,
+# чтобы подхватить изменения из других процессов.
+class IngredientIndex:
+
+    def __init__(self):
+        self.lock = Lock()
+        self.snapshot = None
+
+    def invalidate(self):
+        self.snapshot = None
+
+    def build(self):
+        items = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda item: (item['name'].lower(), item['name'])
+        )
+        return (
+            monotonic(),
+            [item['name'].lower() for item in items],
+            items
+        )
+
+    def get_snapshot(self):
+        snapshot = self.snapshot
+        if (
+            snapshot is None
+            or monotonic() - snapshot[0] > settings.INGREDIENT_INDEX_TTL
+        ):
+            with self.lock:
+                if self.snapshot is snapshot:
+                    self.snapshot = self.build()
+                snapshot = self.snapshot
+        return snapshot
+
+    def search(self, name='', limit=None, contains=False):
+        _, names, items = self.get_snapshot()
+        name = name.lower()
+        found = []
+        for position in range(bisect_left(names, name), len(names)):
+            if len(found) == limit or not names[position].startswith(name):
+                break
+            found.append(items[position])
+        if contains and name:
+            # Совпадения по вхождению идут после совпадений по началу.
+            for position, item_name in enumerate(names):
+                if len(found) == limit:
+                    break
+                if name in item_name and not item_name.startswith(name):
+                    found.append(items[position])
+        return found
+
+
+ingredient_index = IngredientIndex()
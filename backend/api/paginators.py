@@ -1,6 +1,147 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class FoodgramPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page = None
+        if request.query_params.get(self.count_query_param) != 'false':
+            return super().paginate_queryset(queryset, request, view)
+        # Без подсчета общего числа объектов: берем на один объект больше
+        # страницы, чтобы узнать, есть ли следующая.
+        self.request = request
+        page_size = self.get_page_size(request)
+        page_number = request.query_params.get(self.page_query_param, '1')
+        if not page_number.isdigit() or int(page_number) < 1:
+            raise NotFound('Неверная страница.')
+        self.page_number = int(page_number)
+        start = (self.page_number - 1) * page_size
+        items = list(queryset[start:start + page_size + 1])
+        self.has_next = len(items) > page_size
+        return items[:page_size]
+
+    def get_next_link(self):
+        if self.page is not None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param,
+            self.page_number + 1
+        )
+
+    def get_previous_link(self):
+        if self.page is not None:
+            return super().get_previous_link()
+        url = self.request.build_absolute_uri()
+        if self.page_number == 1:
+            return None
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1
+        )
+
+    def get_paginated_response(self, data):
+        if self.page is not None:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': None,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+
+class RecipePagination(FoodgramPagination):
+    # ?cursor= включает постраничный вывод по ключу (pub_date, id)
+    # вместо OFFSET, глубокие страницы при этом не замедляются.
+    cursor_query_param = 'cursor'
+
+    @staticmethod
+    def encode_cursor(pub_date, recipe_id):
+        return urlsafe_b64encode(
+            f'{pub_date.isoformat()}|{recipe_id}'.encode()
+        ).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            pub_date, recipe_id = urlsafe_b64decode(
+                cursor.encode()
+            ).decode().split('|')
+            pub_date = parse_datetime(pub_date)
+            if pub_date is None:
+                raise ValueError
+            return pub_date, int(recipe_id)
+        except (DecodeError, UnicodeDecodeError, ValueError):
+            raise NotFound('Неверный курсор.')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = request.query_params.get(self.cursor_query_param)
+        if self.cursor is None:
+            return super().paginate_queryset(queryset, request, view)
+        if queryset.query.order_by:
+            # Курсор задает порядок (pub_date, id) и молча отменил бы
+            # сортировку по популярности или релевантности поиска.
+            raise ValidationError(
+                'Курсор нельзя сочетать с сортировкой и поиском.'
+            )
+        self.page = None
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-pub_date', '-id')
+        if self.cursor:
+            pub_date, recipe_id = self.decode_cursor(self.cursor)
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, id__lt=recipe_id)
+            )
+        items = list(queryset[:page_size + 1])
+        self.next_cursor = (
+            self.encode_cursor(
+                items[page_size - 1].pub_date, items[page_size - 1].id
+            ) if len(items) > page_size else None
+        )
+        return items[:page_size]
+
+    def paginate_keys(self, request, get_page):
+        # Для выборок, которые сами строят страницу ключей (pub_date, id):
+        # get_page(курсор, размер) возвращает ключи и признак продолжения.
+        self.page = None
+        self.request = request
+        self.cursor = request.query_params.get(self.cursor_query_param, '')
+        keys, has_next = get_page(
+            self.decode_cursor(self.cursor) if self.cursor else None,
+            self.get_page_size(request)
+        )
+        self.next_cursor = self.encode_cursor(*keys[-1]) if has_next else None
+        return keys
+
+    def get_next_link(self):
+        if self.cursor is None:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor
+        )
+
+    def get_previous_link(self):
+        if self.cursor is None:
+            return super().get_previous_link()
+        return None
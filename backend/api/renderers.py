@@ -0,0 +1,33 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Сам файл отдается потоком из представления, через рендерер
+        # проходят только ответы с ошибками.
+        return JSONRenderer().render(data)
+
+
+class TxtShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class CsvShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class PdfShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+
+SHOPPING_CART_RENDERERS = (
+    TxtShoppingCartRenderer,
+    CsvShoppingCartRenderer,
+    PdfShoppingCartRenderer,
+)
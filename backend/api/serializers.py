@@ -1,26 +1,44 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
+from django.db import transaction
 from djoser.serializers import UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
 from recipes.constants import MINIMAL_AMOUNT, MINIMAL_TIME
+from recipes.images import image_renditions
 from recipes.models import (
-    Favorite, Ingredient, Recipe,
-    RecipeIngredient, ShopingCart, Subscription, Tag
+    Favorite, Ingredient, Recipe, RecipeIngredient, RecipeSearch,
+    ShopingCart, ShopingCartIngredient, Subscription, Tag
 )
 
 
 User = get_user_model()
 
 
+class ImageRenditionsField(serializers.Field):
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, image):
+        if not image:
+            return None
+        return image_renditions(image.name, self.context.get('request'))
+
+
 class FoodgramUserSerializer(UserSerializer):
     avatar = Base64ImageField(required=False)
+    avatar_renditions = ImageRenditionsField(source='avatar')
     is_subscribed = serializers.SerializerMethodField(default=False)
 
     class Meta:
         model = User
-        fields = (*UserSerializer.Meta.fields, 'avatar', 'is_subscribed')
+        fields = (
+            *UserSerializer.Meta.fields,
+            'avatar', 'avatar_renditions', 'is_subscribed'
+        )
 
     def validate_username(username):
         RegexValidator(
@@ -29,15 +47,24 @@ class FoodgramUserSerializer(UserSerializer):
         )(username)
         return username
 
+    def get_subscriptions(self):
+        # Контекст общий для всех вложенных сериализаторов запроса,
+        # поэтому подписки загружаются один раз.
+        if 'subscriptions' not in self.context:
+            request = self.context.get('request')
+            self.context['subscriptions'] = (
+                set(Subscription.objects.filter(
+                    follower=request.user
+                ).values_list('author_id', flat=True))
+                if request is not None and request.user.is_authenticated
+                else set()
+            )
+        return self.context['subscriptions']
+
     def get_is_subscribed(self, author):
-        request = self.context.get('request')
-        return (
-            request is not None
-            and request.user.is_authenticated
-            and Subscription.objects.filter(
-                follower=request.user, author=author
-            ).exists()
-        )
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
+        return author.id in self.get_subscriptions()
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -54,11 +81,14 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class IngredientSearchSerializer(serializers.Serializer):
+    name = serializers.CharField(required=False, default='')
+    limit = serializers.IntegerField(min_value=1, required=False)
+    contains = serializers.BooleanField(default=False)
+
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient',
-    )
+    id = serializers.IntegerField(source='ingredient_id')
     name = serializers.ReadOnlyField(source='ingredient.name')
     measurement_unit = serializers.ReadOnlyField(
         source='ingredient.measurement_unit'
@@ -71,10 +101,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 
 
 class RecipeSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all()
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     ingredients = RecipeIngredientSerializer(
         many=True,
         source='recipe_ingredients'
@@ -100,41 +127,112 @@ class RecipeSerializer(serializers.ModelSerializer):
         ) for ingredient in ingredients)
 
     @staticmethod
-    def fields_validation(data, message):
-        if not data:
-            raise serializers.ValidationError(f'Отсутствуют {message}ы!')
-        items = set()
-        for item in data:
-            if isinstance(item, dict):
-                item = item['ingredient']
-            if item in items:
+    def fields_validation(ids, model, message, plural):
+        # Все объекты загружаются одним запросом, отсутствующие id
+        # перечисляются в ошибке разом.
+        if not ids:
+            raise serializers.ValidationError(f'Отсутствуют {plural}!')
+        items = model.objects.in_bulk(ids)
+        missing = [str(item_id) for item_id in ids if item_id not in items]
+        if missing:
+            raise serializers.ValidationError(
+                f'Не найдены {plural} с id {", ".join(missing)}!'
+            )
+        unique_ids = set()
+        for item_id in ids:
+            if item_id in unique_ids:
                 raise serializers.ValidationError(
-                    f'Дублируется {message} {item.name}!')
-            items.add(item)
-        return data
+                    f'Дублируется {message} {items[item_id].name}!'
+                )
+            unique_ids.add(item_id)
+        return items
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('recipe_ingredients', [])
         tags = validated_data.pop('tags', [])
         recipe = super().create(validated_data)
         self.handling_tags_ingredient(recipe, tags, ingredients)
+        RecipeSearch.objects.update_documents((recipe.id,))
         return recipe
 
+    @staticmethod
+    def updating_tags_ingredients(recipe, tags, ingredients):
+        # Меняются только отличающиеся строки: tags.set сам удаляет и
+        # добавляет разницу, для продуктов разница считается здесь.
+        recipe.tags.set(tags)
+        amounts = {
+            ingredient['ingredient'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        stored = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        RecipeIngredient.objects.filter(id__in=[
+            item.id for item in stored.values()
+            if item.ingredient_id not in amounts
+        ]).delete()
+        changed = [
+            item for item in stored.values()
+            if amounts.get(item.ingredient_id, item.amount) != item.amount
+        ]
+        # bulk_update и bulk_create не отправляют сигналов, поэтому для
+        # них корзины с рецептом пересчитываются здесь. Удаленные строки
+        # вычитает сигнал pre_delete.
+        ShopingCartIngredient.objects.change_amounts(
+            list(recipe.shopingcarts.values_list('user_id', flat=True)),
+            {
+                ingredient_id: amount - (
+                    stored[ingredient_id].amount
+                    if ingredient_id in stored else 0
+                ) for ingredient_id, amount in amounts.items()
+            }
+        )
+        for item in changed:
+            item.amount = amounts[item.ingredient_id]
+        RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount
+            ) for ingredient_id, amount in amounts.items()
+            if ingredient_id not in stored
+        )
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.ingredients.clear()
-        instance.tags.clear()
-        ingredients = validated_data.pop('recipe_ingredients', None)
-        tags = validated_data.pop('tags', None)
-        self.validate_ingredients(ingredients)
-        self.validate_tags(tags)
-        self.handling_tags_ingredient(instance, tags, ingredients)
-        return super().update(instance, validated_data)
+        ingredients = validated_data.pop('recipe_ingredients')
+        tags = validated_data.pop('tags')
+        self.updating_tags_ingredients(instance, tags, ingredients)
+        recipe = super().update(instance, validated_data)
+        RecipeSearch.objects.update_documents((recipe.id,))
+        return recipe
+
+    def validate(self, data):
+        for field, plural in (
+            ('recipe_ingredients', 'продукты'), ('tags', 'теги')
+        ):
+            if field not in data:
+                raise serializers.ValidationError(f'Отсутствуют {plural}!')
+        return data
 
     def validate_ingredients(self, ingredients_data):
-        return self.fields_validation(ingredients_data, 'продукт')
+        ingredients = self.fields_validation(
+            [item['ingredient_id'] for item in ingredients_data],
+            Ingredient,
+            'продукт',
+            'продукты'
+        )
+        return [{
+            'ingredient': ingredients[item['ingredient_id']],
+            'amount': item['amount']
+        } for item in ingredients_data]
 
     def validate_tags(self, tags_data):
-        return self.fields_validation(tags_data, 'тег')
+        tags = self.fields_validation(tags_data, Tag, 'тег', 'теги')
+        return [tags[tag_id] for tag_id in tags_data]
 
     def validate_image(self, image_data):
         if not image_data:
@@ -143,7 +241,12 @@ class RecipeSerializer(serializers.ModelSerializer):
         return image_data
 
     def to_representation(self, instance):
-        return ReadRecipeSerializer(instance, context=self.context).data
+        return ReadRecipeSerializer(
+            Recipe.objects.with_related(
+                self.context['request'].user
+            ).get(pk=instance.pk),
+            context=self.context
+        ).data
 
 
 class ReadRecipeSerializer(serializers.ModelSerializer):
@@ -153,18 +256,21 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
         source='recipe_ingredients'
     )
     author = FoodgramUserSerializer(read_only=True)
+    image_renditions = ImageRenditionsField(source='image')
     is_favorited = serializers.SerializerMethodField(default=False)
     is_in_shopping_cart = serializers.SerializerMethodField(default=False)
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'name', 'image', 'text', 'author',
+            'id', 'name', 'image', 'image_renditions', 'text', 'author',
             'ingredients', 'tags', 'cooking_time',
             'is_favorited', 'is_in_shopping_cart'
         )
 
-    def fields_acquiring(self, recipe, model):
+    def fields_acquiring(self, recipe, model, annotation):
+        if hasattr(recipe, annotation):
+            return getattr(recipe, annotation)
         user = self.context.get('request').user
         return (
             user is not None
@@ -173,22 +279,25 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, recipe):
-        return self.fields_acquiring(recipe, Favorite)
+        return self.fields_acquiring(recipe, Favorite, 'is_favorited')
 
     def get_is_in_shopping_cart(self, recipe):
-        return self.fields_acquiring(recipe, ShopingCart)
+        return self.fields_acquiring(
+            recipe, ShopingCart, 'is_in_shopping_cart'
+        )
 
 
 class SmallRecipeSerializer(serializers.ModelSerializer):
+    image_renditions = ImageRenditionsField(source='image')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_renditions', 'cooking_time')
 
 
 class UserSubscribingSerializer(FoodgramUserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='recipes.count')
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -198,9 +307,7 @@ class UserSubscribingSerializer(FoodgramUserSerializer):
 
     def get_recipes(self, author):
         return SmallRecipeSerializer(
-            author.recipes.all()[:int(self.context.get(
-                'request'
-            ).query_params.get('recipes_limit', 100000))],
+            author.limited_recipes,
             many=True,
             context=self.context
         ).data
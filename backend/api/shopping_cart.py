@@ -1,5 +1,9 @@
+import csv
+import textwrap
 from datetime import datetime as dt
 
+from recipes.models import ShopingCart, ShopingCartIngredient
+
 DELIMETER = '\n'
 
 REPORT_NAME = 'Список покупок'
@@ -14,6 +18,8 @@ TEMPLATE_RECIPES = '{}. {}'
 
 MAX_MEASURE_VISUAL = 2
 
+CSV_HEADER = ('Продукт', 'Количество', 'Единица измерения')
+
 # на докер образ не получилось установить локали, поэтому реализую
 # дату таким образом
 MONTHS = [
@@ -23,28 +29,201 @@ MONTHS = [
     'октября', 'ноября', 'декабря'
 ]
 
+PDF_PAGE_WIDTH = 595
+
+PDF_PAGE_HEIGHT = 842
+
+PDF_MARGIN = 50
+
+PDF_FONT_SIZE = 12
+
+PDF_LEADING = 16
+
+PDF_LINES_PER_PAGE = (PDF_PAGE_HEIGHT - 2 * PDF_MARGIN) // PDF_LEADING
+
+# Метрик шрифта в документе нет, поэтому строки переносятся по числу
+# символов средней ширины, а все, что все же шире поля, обрезается.
+PDF_CHAR_WIDTH = 0.6
+
+PDF_LINE_LENGTH = int(
+    (PDF_PAGE_WIDTH - 2 * PDF_MARGIN) / (PDF_FONT_SIZE * PDF_CHAR_WIDTH)
+)
+
+PDF_WRAP_INDENT = '    '
+
+PDF_ENCODING = 'cp1251'
+
+# Стандартные шрифты PDF не содержат кириллицу в кодировке WinAnsi,
+# поэтому символы cp1251 переназначаются на кириллические глифы.
+PDF_CYRILLIC_UPPER = 'АБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+
+
+def pdf_glyph_name(letter, base):
+    number = PDF_CYRILLIC_UPPER.index(letter)
+    return f'/afii{base + number + (number > 5)}'
+
+
+PDF_FONT_DIFFERENCES = ' '.join(
+    [f'168 /afii10023 184 /afii10071 {0xC0}']
+    + [pdf_glyph_name(letter, 10017) for letter in PDF_CYRILLIC_UPPER]
+    + [pdf_glyph_name(letter, 10065) for letter in PDF_CYRILLIC_UPPER]
+)
+
+
+def form_date():
+    today = dt.now()
+    return f'{today.day} {MONTHS[today.month - 1]} {today.year}'
+
+
+def shopping_cart_items(user):
+    return (
+        ShopingCart.objects.filter(
+            user=user
+        ).values_list('recipe__name', flat=True).iterator(),
+        ShopingCartIngredient.objects.filter(
+            user=user, amount__gt=0
+        ).values(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount'
+        ).order_by('ingredient__name').iterator()
+    )
+
 
-def form_shopping_cart(recipes_names, ingredients):
-    date = f'{dt.now().day} {MONTHS[int(dt.now().month) - 1]} {dt.now().year}'
-    # date = dt.today().strftime('%d %B %Y')
-    ingredients_to_text = DELIMETER.join([
-        TEMPLATE_INGREDIENTS.format(
+def shopping_cart_lines(recipes_names, ingredients):
+    yield form_date()
+    yield REPORT_NAME
+    yield INGREDIENTS_LIST
+    for number, ingredient in enumerate(ingredients, 1):
+        yield TEMPLATE_INGREDIENTS.format(
             number,
             ingredient['ingredient__name'].capitalize(),
             ingredient['amount'],
             ingredient['ingredient__measurement_unit'][:MAX_MEASURE_VISUAL]
-        ) for number, ingredient in enumerate(ingredients, 1)
-    ])
-    recipes_to_text = DELIMETER.join(
-        (TEMPLATE_RECIPES.format(
-            number, name
-        ) for number, name in enumerate(recipes_names, 1))
+        )
+    yield RECIPES_LIST
+    for number, name in enumerate(recipes_names, 1):
+        yield TEMPLATE_RECIPES.format(number, name)
+
+
+def form_shopping_cart_txt(recipes_names, ingredients):
+    for line in shopping_cart_lines(recipes_names, ingredients):
+        yield line + DELIMETER
+
+
+class CsvLineBuffer:
+
+    def write(self, value):
+        return value
+
+
+def form_shopping_cart_csv(recipes_names, ingredients):
+    writer = csv.writer(CsvLineBuffer())
+    yield writer.writerow(CSV_HEADER)
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['amount'],
+            ingredient['ingredient__measurement_unit']
+        ))
+
+
+def pdf_text(line):
+    return line.encode(PDF_ENCODING, errors='replace').replace(
+        b'\\', b'\\\\'
+    ).replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def pdf_lines(lines):
+    for line in lines:
+        yield from textwrap.wrap(
+            line, PDF_LINE_LENGTH, subsequent_indent=PDF_WRAP_INDENT
+        ) or ['']
+
+
+def pdf_page_content(lines):
+    content = [
+        b'q',
+        (
+            f'{PDF_MARGIN} {PDF_MARGIN} {PDF_PAGE_WIDTH - 2 * PDF_MARGIN} '
+            f'{PDF_PAGE_HEIGHT - 2 * PDF_MARGIN} re W n'
+        ).encode(),
+        b'BT',
+        f'/F1 {PDF_FONT_SIZE} Tf {PDF_LEADING} TL'.encode(),
+        f'{PDF_MARGIN} {PDF_PAGE_HEIGHT - PDF_MARGIN} Td'.encode(),
+    ]
+    content.extend(b'(' + pdf_text(line) + b') Tj T*' for line in lines)
+    content.extend((b'ET', b'Q'))
+    return b'\n'.join(content)
+
+
+def form_shopping_cart_pdf(recipes_names, ingredients):
+    # Документ пишется постранично: каждая страница отдается клиенту,
+    # как только набраны ее строки, в памяти хранятся только смещения
+    # объектов для таблицы xref.
+    catalog, pages, font = 1, 2, 3
+    offsets = {}
+    kids = []
+    position = 0
+
+    def write_object(number, body):
+        nonlocal position
+        offsets[number] = position
+        chunk = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        position += len(chunk)
+        return chunk
+
+    def write_page(lines):
+        content = pdf_page_content(lines)
+        content_number = len(offsets) + 1
+        page_number = content_number + 1
+        kids.append(page_number)
+        return write_object(
+            content_number,
+            b'<< /Length %d >>\nstream\n' % len(content)
+            + content + b'\nendstream'
+        ) + write_object(page_number, (
+            f'<< /Type /Page /Parent {pages} 0 R '
+            f'/MediaBox [0 0 {PDF_PAGE_WIDTH} {PDF_PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 {font} 0 R >> >> '
+            f'/Contents {content_number} 0 R >>'
+        ).encode())
+
+    header = b'%PDF-1.4\n'
+    position = len(header)
+    yield header + write_object(font, (
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+        '/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding '
+        f'/Differences [{PDF_FONT_DIFFERENCES}] >> >>'
+    ).encode())
+    # Номера 1 и 2 зарезервированы за каталогом и деревом страниц.
+    offsets[catalog] = offsets[pages] = None
+    lines = []
+    for line in pdf_lines(shopping_cart_lines(recipes_names, ingredients)):
+        lines.append(line)
+        if len(lines) == PDF_LINES_PER_PAGE:
+            yield write_page(lines)
+            lines = []
+    if lines or not kids:
+        yield write_page(lines)
+    yield write_object(pages, (
+        f'<< /Type /Pages /Count {len(kids)} /Kids ['
+        + ' '.join(f'{kid} 0 R' for kid in kids)
+        + '] >>'
+    ).encode()) + write_object(
+        catalog, f'<< /Type /Catalog /Pages {pages} 0 R >>'.encode()
+    )
+    xref = [b'xref', b'0 %d' % (len(offsets) + 1), b'0000000000 65535 f ']
+    xref.extend(
+        b'%010d 00000 n ' % offsets[number]
+        for number in range(1, len(offsets) + 1)
     )
-    return DELIMETER.join([
-        date,
-        REPORT_NAME,
-        INGREDIENTS_LIST,
-        ingredients_to_text,
-        RECIPES_LIST,
-        recipes_to_text
-    ])
+    yield b'\n'.join(xref) + (
+        f'\ntrailer\n<< /Size {len(offsets) + 1} /Root {catalog} 0 R >>\n'
+        f'startxref\n{position}\n%%EOF\n'
+    ).encode()
+
+
+SHOPPING_CART_FORMATS = {
+    'txt': form_shopping_cart_txt,
+    'csv': form_shopping_cart_csv,
+    'pdf': form_shopping_cart_pdf,
+}
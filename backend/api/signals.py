@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache_key
+from api.cache import bump_versions
+from api.ingredient_index import ingredient_index
+from recipes.images import renditions_ready
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            Subscription, Tag)
+
+User = get_user_model()
+
+
+def bump_on_commit(*names):
+    transaction.on_commit(lambda: bump_versions(*names))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    ingredient_index.invalidate()
+    bump_on_commit('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(**kwargs):
+    bump_on_commit('tags')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes(action='post', **kwargs):
+    if action.startswith('post'):
+        bump_on_commit('recipes')
+
+
+@receiver((post_save, post_delete), sender=User)
+@receiver((post_save, post_delete), sender=Subscription)
+def invalidate_users(update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login, который не отдается
+    # через API.
+    if update_fields != frozenset(('last_login',)):
+        bump_on_commit('users')
+
+
+@receiver(renditions_ready)
+def invalidate_renditions(**kwargs):
+    # Копии строятся после коммита, часто в отдельном потоке, поэтому
+    # версии меняются сразу.
+    bump_versions('recipes', 'users')
+
+
+def delete_token_cache(*keys):
+    cache_keys = [token_cache_key(key) for key in keys]
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(instance, **kwargs):
+    delete_token_cache(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(instance, created, update_fields=None, **kwargs):
+    # У нового пользователя токенов нет, last_login в снимок не входит.
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    delete_token_cache(*Token.objects.filter(
+        user=instance
+    ).values_list('key', flat=True))
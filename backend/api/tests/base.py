@@ -0,0 +1,99 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+PASSWORD = 'Foodgram-test-1'
+
+
+def image_data():
+    buffer = BytesIO()
+    Image.new('RGB', (20, 20), 'red').save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+class FoodgramTestCase(APITestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(
+                email=f'user{number}@foodgram.ru',
+                username=f'user{number}',
+                password=PASSWORD,
+                first_name='Имя',
+                last_name='Фамилия'
+            ) for number in range(3)
+        ]
+        self.tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(
+                name=f'продукт {number}', measurement_unit='г'
+            ) for number in range(5)
+        ]
+        self.user = self.users[0]
+        self.token = Token.objects.create(user=self.user)
+        self.guest_client = APIClient()
+        self.authorized_client = APIClient()
+        self.authorized_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+    def create_recipe(self, author, number=0, ingredients=3):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=f'Рецепт {number}',
+            text='Описание',
+            image='recipes/images/recipe.png',
+            cooking_time=5 + number
+        )
+        recipe.tags.set(self.tags[:2])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+            for ingredient in self.ingredients[:ingredients]
+        )
+        return recipe
+
+    def recipe_payload(self, ingredients, tags, **fields):
+        return {
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient, amount in ingredients
+            ],
+            'tags': [tag.id for tag in tags],
+            'image': image_data(),
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            **fields
+        }
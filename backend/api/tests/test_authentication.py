@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache_key
+
+from .base import PASSWORD, FoodgramTestCase, image_data
+
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTest(FoodgramTestCase):
+
+    def me(self, client=None):
+        return (client or self.authorized_client).get('/api/users/me/')
+
+    def test_cache_hit_costs_no_queries(self):
+        self.assertEqual(self.me().status_code, 200)
+        snapshot = cache.get(token_cache_key(self.token.key))
+        self.assertEqual(snapshot['id'], self.user.pk)
+        self.assertNotIn('password', snapshot)
+        self.authorized_client.get('/api/tags/')
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.me().data['email'], self.user.email)
+        self.assertFalse(any(
+            'authtoken_token' in query['sql'] or 'password' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_user_save_refreshes_snapshot(self):
+        self.assertEqual(self.me().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Новое'
+            self.user.save()
+        self.assertEqual(self.me().data['first_name'], 'Новое')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_update_is_seen_after_cache_timeout(self):
+        self.assertEqual(self.me().status_code, 200)
+        # update() обходит сигналы: до истечения снимка в кеше действует
+        # прежнее значение.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.me().status_code, 200)
+        cache.delete(token_cache_key(self.token.key))
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_avatar_update_keeps_password(self):
+        self.assertEqual(self.me().status_code, 200)
+        response = self.authorized_client.put(
+            '/api/users/me/avatar/', {'avatar': image_data()}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password(PASSWORD))
+        self.assertTrue(self.user.avatar.name)
+
+    def test_logout_invalidates_token(self):
+        self.assertEqual(self.me().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.authorized_client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_login_after_logout(self):
+        response = self.guest_client.post(
+            '/api/auth/token/login/',
+            {'email': self.users[1].email, 'password': PASSWORD}
+        )
+        self.assertEqual(response.status_code, 200)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {response.data["auth_token"]}'
+        )
+        for _ in range(2):
+            self.assertEqual(
+                self.me(client).data['username'], self.users[1].username
+            )
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.async_views import cached_json_response
+from api.cache import get_versions, version_key
+from recipes.models import Tag
+
+from .base import FoodgramTestCase
+
+
+class ResponseCacheTest(FoodgramTestCase):
+
+    def test_cached_response_and_etag(self):
+        response = self.guest_client.get('/api/tags/')
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as context:
+            cached = self.guest_client.get('/api/tags/')
+        self.assertEqual(len(context), 0)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], etag)
+        response = self.guest_client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Новый', slug='new')
+        response = self.guest_client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 4)
+
+    def test_etag_follows_content_not_versions(self):
+        # Процесс со старыми версиями данных не подтверждает устаревший
+        # ETag, как только его копия ответа истекла.
+        etag = self.guest_client.get('/api/tags/')['ETag']
+        Tag.objects.bulk_create([Tag(name='Новый', slug='new')])
+        versions = {version_key('tags'): get_versions(('tags',))[0]}
+        cache.clear()
+        cache.set_many(versions, timeout=None)
+        response = self.guest_client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_async_response_etag(self):
+        request = RequestFactory().get('/api/tags/')
+        response = cached_json_response(request, ('tags',), lambda: [1])
+        etag = response['ETag']
+        request = RequestFactory().get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        response = cached_json_response(request, ('tags',), lambda: [2])
+        self.assertEqual(response.status_code, 304)
+        cache.clear()
+        response = cached_json_response(request, ('tags',), lambda: [2])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(ALLOWED_HOSTS=['foodgram.ru', 'localhost'])
+    def test_cache_key_includes_host(self):
+        self.create_recipe(self.users[1])
+        for host in ('foodgram.ru', 'localhost'):
+            with self.subTest(host=host):
+                response = self.guest_client.get(
+                    '/api/recipes/', HTTP_HOST=host
+                )
+                self.assertIn(
+                    f'http://{host}/', response.json()['results'][0]['image']
+                )
@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe
+
+from .base import FoodgramTestCase
+
+
+class RecipeCountersTest(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.recipes = [
+            self.create_recipe(self.users[1], number) for number in range(3)
+        ]
+        self.recipe = self.recipes[0]
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(self.users[2])
+
+    def counters(self, recipe=None):
+        return Recipe.objects.values_list(
+            'favorites_count', 'in_carts_count'
+        ).get(pk=(recipe or self.recipe).pk)
+
+    def test_increment_and_decrement(self):
+        url = f'/api/recipes/{self.recipe.id}'
+        for client in (self.authorized_client, self.other_client):
+            self.assertEqual(
+                client.post(f'{url}/favorite/').status_code, 201
+            )
+        self.authorized_client.post(f'{url}/shopping_cart/')
+        self.assertEqual(self.counters(), (2, 1))
+        # Повторное добавление не меняет счетчик.
+        self.assertEqual(
+            self.authorized_client.post(f'{url}/favorite/').status_code, 400
+        )
+        self.assertEqual(self.counters(), (2, 1))
+        self.authorized_client.delete(f'{url}/favorite/')
+        self.authorized_client.delete(f'{url}/shopping_cart/')
+        self.assertEqual(self.counters(), (1, 0))
+
+    def test_decrement_not_below_zero(self):
+        # bulk_create обходит API, счетчик остается нулевым.
+        Favorite.objects.bulk_create(
+            [Favorite(user=self.user, recipe=self.recipe)]
+        )
+        response = self.authorized_client.delete(
+            f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_stale_recipe_save_keeps_counters(self):
+        stale = Recipe.objects.get(pk=self.recipe.pk)
+        self.authorized_client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        stale.name = 'Новое название'
+        stale.save()
+        self.assertEqual(self.counters(), (1, 0))
+
+    def test_popular_ordering(self):
+        for recipe, clients in (
+            (self.recipes[1], (self.authorized_client, self.other_client)),
+            (self.recipes[2], (self.authorized_client,)),
+        ):
+            for client in clients:
+                client.post(f'/api/recipes/{recipe.id}/favorite/')
+        response = self.guest_client.get('/api/recipes/?ordering=popular')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipe.id for recipe in (
+                self.recipes[1], self.recipes[2], self.recipes[0]
+            )]
+        )
+        for query in ('ordering=popular&cursor=', 'search=рецепт&cursor='):
+            with self.subTest(query=query):
+                response = self.guest_client.get(f'/api/recipes/?{query}')
+                self.assertEqual(response.status_code, 400)
+
+    def reconcile(self, *args):
+        output = StringIO()
+        call_command('reconcilecounters', *args, stdout=output)
+        return output.getvalue()
+
+    def test_reconcilecounters_check_and_repair(self):
+        self.authorized_client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        Recipe.objects.filter(pk=self.recipe.pk).update(in_carts_count=3)
+        Recipe.objects.filter(pk=self.recipes[1].pk).update(
+            favorites_count=2
+        )
+        self.assertIn('Рецептов с расхождениями: 2', self.reconcile('--check'))
+        self.assertEqual(self.counters(), (1, 3))
+        self.assertIn('Рецептов с расхождениями: 2', self.reconcile())
+        self.assertEqual(self.counters(), (1, 0))
+        self.assertEqual(self.counters(self.recipes[1]), (0, 0))
+        self.assertIn('Рецептов с расхождениями: 0', self.reconcile('--check'))
@@ -0,0 +1,43 @@
+from unittest import skipUnless
+
+import psycopg2
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from foodgram.postgresql.base import ConnectionPool
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Нужна PostgreSQL')
+class ConnectionPoolTest(SimpleTestCase):
+    databases = {'default'}
+
+    def connect(self):
+        return psycopg2.connect(**connection.get_connection_params())
+
+    def test_pool_reuses_and_limits_connections(self):
+        pool = ConnectionPool(1, 0.1)
+        first = pool.acquire(self.connect, True)
+        with self.assertRaises(OperationalError):
+            pool.acquire(self.connect, True)
+        with first.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        pool.release(first)
+        self.assertEqual(
+            first.info.transaction_status, TRANSACTION_STATUS_IDLE
+        )
+        self.assertIs(pool.acquire(self.connect, True), first)
+        pool.release(first)
+        pool.clear()
+        self.assertTrue(first.closed)
+
+    def test_broken_connection_is_replaced(self):
+        pool = ConnectionPool(1, 0.1)
+        first = pool.acquire(self.connect, True)
+        pool.release(first)
+        first.close()
+        second = pool.acquire(self.connect, True)
+        self.assertIsNot(second, first)
+        pool.release(second)
+        pool.clear()
@@ -0,0 +1,150 @@
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from recipes.feed import fan_out_in_worker, feed_page
+from recipes.models import FeedItem, Recipe, Subscription
+
+from .base import FoodgramTestCase
+
+fill_feed_items = import_module(
+    'recipes.migrations.0009_fill_feeditem'
+).fill_feed_items
+
+
+@mock.patch('recipes.feed.executor', None)
+class FeedTest(FoodgramTestCase):
+
+    def create_recipe(self, *args, **kwargs):
+        # Ленты заполняются после коммита, копии несуществующего
+        # изображения рецепта не строятся.
+        with mock.patch('recipes.signals.schedule_renditions'):
+            with self.captureOnCommitCallbacks(execute=True):
+                return super().create_recipe(*args, **kwargs)
+
+    def feed(self, url='/api/users/feed/?limit=2'):
+        recipe_ids, pages = [], 0
+        while url:
+            response = self.authorized_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            recipe_ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+            pages += 1
+        return recipe_ids, pages
+
+    def feed_recipe_ids(self):
+        return list(FeedItem.objects.filter(user=self.user).order_by(
+            '-pub_date', '-recipe_id'
+        ).values_list('recipe_id', flat=True))
+
+    def test_fan_out_and_cursor_pages(self):
+        author, stranger = self.users[1], self.users[2]
+        self.create_recipe(author, 0)
+        response = self.authorized_client.post(
+            f'/api/users/{author.id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 201)
+        recipes = [self.create_recipe(author, number) for number in (1, 2, 3)]
+        self.create_recipe(stranger, 4)
+        recipe_ids, pages = self.feed()
+        self.assertEqual(recipe_ids, list(
+            Recipe.objects.filter(author=author).values_list('id', flat=True)
+        ))
+        self.assertEqual(pages, 2)
+        # Изменение рецепта поднимает его в ленте.
+        recipes[0].name = 'Новое название'
+        recipes[0].save()
+        self.assertEqual(self.feed()[0][0], recipes[0].id)
+        response = self.authorized_client.get('/api/users/feed/?cursor=bad')
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get('/api/users/feed/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_unsubscribe_clears_feed(self):
+        author = self.users[1]
+        self.create_recipe(author)
+        self.authorized_client.post(f'/api/users/{author.id}/subscribe/')
+        response = self.authorized_client.delete(
+            f'/api/users/{author.id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Subscription.objects.exists())
+        self.assertEqual(self.feed()[0], [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_popular_author_merged_on_read(self):
+        author = self.users[1]
+        self.authorized_client.post(f'/api/users/{author.id}/subscribe/')
+        for number in range(3):
+            self.create_recipe(author, number)
+        self.assertFalse(FeedItem.objects.exists())
+        cache.clear()
+        self.assertEqual(self.feed()[0], list(
+            Recipe.objects.values_list('id', flat=True)
+        ))
+        with self.assertNumQueries(2):
+            feed_page(self.user, None, 2)
+
+    @override_settings(FEED_MAX_ITEMS=2)
+    def test_feed_is_trimmed(self):
+        author = self.users[1]
+        recipes = [self.create_recipe(author, number) for number in range(4)]
+        self.authorized_client.post(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(
+            self.feed_recipe_ids(), [recipes[3].id, recipes[2].id]
+        )
+        recipe = self.create_recipe(author, 5)
+        self.assertEqual(len(self.feed_recipe_ids()), 3)
+        call_command('trimfeeds', stdout=StringIO())
+        self.assertEqual(self.feed_recipe_ids(), [recipe.id, recipes[3].id])
+
+    @override_settings(FEED_MAX_ITEMS=3)
+    def test_migration_fills_feeds(self):
+        first, second = self.users[1], self.users[2]
+        recipes = [
+            self.create_recipe((first, second)[number % 2], number)
+            for number in range(6)
+        ]
+        Subscription.objects.bulk_create([
+            Subscription(follower=self.user, author=author)
+            for author in (first, second)
+        ])
+        self.assertFalse(FeedItem.objects.exists())
+        fill_feed_items(apps, None)
+        self.assertEqual(self.feed_recipe_ids(), [
+            recipe.id for recipe in reversed(recipes[3:])
+        ])
+
+    def test_fan_out_runs_in_worker_after_commit(self):
+        author = self.users[1]
+        Subscription.objects.create(follower=self.user, author=author)
+        client = APIClient()
+        client.force_authenticate(author)
+        executor = mock.Mock()
+        with mock.patch('recipes.feed.executor', executor):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = client.post(
+                    '/api/recipes/',
+                    self.recipe_payload(
+                        ((self.ingredients[0], 2),), self.tags[:1]
+                    ),
+                    format='json'
+                )
+            self.assertEqual(response.status_code, 201)
+            self.assertFalse(FeedItem.objects.exists())
+            executor.submit.assert_not_called()
+            for callback in callbacks:
+                callback()
+        executor.submit.assert_called_once_with(
+            fan_out_in_worker, response.data['id']
+        )
+        with mock.patch('recipes.feed.connection') as connection:
+            fan_out_in_worker(response.data['id'])
+        connection.close.assert_called_once()
+        self.assertEqual(self.feed_recipe_ids(), [response.data['id']])
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+
+from recipes.images import generate_renditions, ready_images
+from recipes.models import Recipe
+
+from .base import FoodgramTestCase
+
+User = get_user_model()
+
+
+class ImageRenditionsTest(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        ready_images.clear()
+
+    def card_url(self):
+        response = self.guest_client.get('/api/recipes/')
+        return response.json()['results'][0]['image_renditions']['card']
+
+    def test_cached_list_switches_to_renditions(self):
+        response = self.authorized_client.post(
+            '/api/recipes/',
+            self.recipe_payload(((self.ingredients[0], 2),), self.tags[:1]),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        name = Recipe.objects.get().image.name
+        # Пока копий нет, отдается оригинал, и ответ попадает в кеш.
+        self.assertNotIn('renditions/', self.card_url()['webp'])
+        generate_renditions(name)
+        self.assertIn('renditions/card/', self.card_url()['webp'])
+
+    def test_ready_images_skip_storage(self):
+        response = self.authorized_client.post(
+            '/api/recipes/',
+            self.recipe_payload(((self.ingredients[0], 2),), self.tags[:1]),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        generate_renditions(Recipe.objects.get().image.name)
+        with mock.patch.object(
+            default_storage, 'exists', wraps=default_storage.exists
+        ) as exists:
+            self.authorized_client.get('/api/recipes/')
+        exists.assert_not_called()
+        ready_images.clear()
+        with mock.patch.object(
+            default_storage, 'exists', wraps=default_storage.exists
+        ) as exists:
+            self.authorized_client.get('/api/recipes/')
+        self.assertEqual(exists.call_count, 1)
+
+    def test_renditions_scheduled_only_for_new_image(self):
+        with mock.patch('recipes.signals.schedule_renditions') as schedule:
+            recipe = self.create_recipe(self.users[1])
+            schedule.assert_called_once_with('recipes/images/recipe.png')
+            schedule.reset_mock()
+            recipe = Recipe.objects.get(pk=recipe.pk)
+            recipe.name = 'Новое название'
+            recipe.save()
+            Recipe.objects.only('name').get(pk=recipe.pk).save()
+            user = User.objects.get(pk=self.user.pk)
+            user.first_name = 'Новое имя'
+            user.save()
+            schedule.assert_not_called()
+            recipe.image = 'recipes/images/other.png'
+            recipe.save()
+            schedule.assert_called_once_with('recipes/images/other.png')
+            schedule.reset_mock()
+            user.avatar = 'users/avatar.png'
+            user.save(update_fields=('avatar',))
+            schedule.assert_called_once_with('users/avatar.png')
@@ -0,0 +1,84 @@
+from api.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+from .base import FoodgramTestCase
+
+
+class IngredientIndexTest(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for name in (
+            'сахарная пудра', 'Сахар', 'ванильный сахар', 'соль', 'сало'
+        ):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+        ingredient_index.invalidate()
+
+    def search(self, *args, **kwargs):
+        return [
+            item['name'] for item in ingredient_index.search(*args, **kwargs)
+        ]
+
+    def test_prefix_order(self):
+        self.assertEqual(
+            self.search('сА'), ['сало', 'Сахар', 'сахарная пудра']
+        )
+        self.assertEqual(self.search('продукт'), [
+            f'продукт {number}' for number in range(5)
+        ])
+        self.assertEqual(self.search('нет такого'), [])
+
+    def test_limit(self):
+        self.assertEqual(
+            self.search('продукт', limit=2), ['продукт 0', 'продукт 1']
+        )
+        self.assertEqual(
+            self.search('сахар', limit=1, contains=True), ['Сахар']
+        )
+
+    def test_contains_after_prefix(self):
+        self.assertEqual(self.search('сахар', contains=True), [
+            'Сахар', 'сахарная пудра', 'ванильный сахар'
+        ])
+        self.assertEqual(
+            self.search('сахар', limit=3, contains=True)[-1],
+            'ванильный сахар'
+        )
+        self.assertEqual(self.search('пудра'), [])
+        self.assertEqual(
+            self.search('пудра', contains=True), ['сахарная пудра']
+        )
+
+    def test_api(self):
+        response = self.guest_client.get(
+            '/api/ingredients/', {'name': 'сах', 'contains': 'true'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['name'] for item in response.data],
+            ['Сахар', 'сахарная пудра', 'ванильный сахар']
+        )
+        self.assertEqual(
+            set(response.data[0]), {'id', 'name', 'measurement_unit'}
+        )
+        response = self.guest_client.get('/api/ingredients/', {'limit': 0})
+        self.assertEqual(response.status_code, 400)
+
+    def test_warm_index_without_queries(self):
+        self.search('с')
+        with self.assertNumQueries(0):
+            self.search('сахар', limit=2, contains=True)
+            self.search('продукт')
+
+    def test_invalidated_on_ingredient_save(self):
+        self.assertEqual(self.search('сахарин'), [])
+        ingredient = Ingredient.objects.create(
+            name='сахарин', measurement_unit='г'
+        )
+        self.assertEqual(self.search('сахарин'), ['сахарин'])
+        ingredient.name = 'подсластитель'
+        ingredient.save()
+        self.assertEqual(self.search('сахарин'), [])
+        self.assertEqual(self.search('подсл'), ['подсластитель'])
+        ingredient.delete()
+        self.assertEqual(self.search('подсл'), [])
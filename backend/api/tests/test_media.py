@@ -0,0 +1,54 @@
+import os
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import Recipe
+from recipes.storage import content_addressed_storage
+
+from .base import FoodgramTestCase
+
+
+class MediaTest(FoodgramTestCase):
+
+    def post_recipe(self):
+        response = self.authorized_client.post(
+            '/api/recipes/',
+            self.recipe_payload(((self.ingredients[0], 2),), self.tags[:1]),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return Recipe.objects.get(id=response.data['id'])
+
+    def collect_media(self):
+        call_command('collectmedia', '--min-age', '1', stdout=StringIO())
+
+    def test_identical_uploads_share_file(self):
+        first, second = self.post_recipe(), self.post_recipe()
+        self.assertEqual(first.image.name, second.image.name)
+        path = content_addressed_storage.path(first.image.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            for recipe in (first, second):
+                response = self.authorized_client.delete(
+                    f'/api/recipes/{recipe.id}/'
+                )
+                self.assertEqual(response.status_code, 204)
+        # Удаление идет только через collectmedia с запасом по времени.
+        self.assertTrue(os.path.exists(path))
+        self.collect_media()
+        self.assertTrue(os.path.exists(path))
+        os.utime(path, (0, 0))
+        self.collect_media()
+        self.assertFalse(os.path.exists(path))
+
+    def test_reused_upload_is_protected(self):
+        recipe = self.post_recipe()
+        path = content_addressed_storage.path(recipe.image.name)
+        recipe.delete()
+        os.utime(path, (0, 0))
+        # Повторная загрузка тех же данных до сохранения записи.
+        with open(path, 'rb') as file:
+            name = content_addressed_storage.save('recipes/images/a.png', file)
+        self.assertEqual(name, recipe.image.name)
+        self.collect_media()
+        self.assertTrue(os.path.exists(path))
@@ -0,0 +1,205 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient, RecipeIngredient
+
+from .base import FoodgramTestCase
+
+
+class RecipeListTest(FoodgramTestCase):
+
+    def recipe_list_queries(self, client, limit):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'/api/recipes/?limit={limit}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), limit)
+        return len(context)
+
+    def test_recipe_list_query_count_does_not_grow_with_page(self):
+        for number in range(8):
+            self.create_recipe(self.users[number % 3], number)
+        for client, expected in (
+            (self.guest_client, 5),
+            (self.authorized_client, 6),
+        ):
+            for limit in (2, 8):
+                with self.subTest(client=client, limit=limit):
+                    # Кеш ответов не должен прятать запросы к базе.
+                    cache.clear()
+                    self.assertEqual(
+                        self.recipe_list_queries(client, limit), expected
+                    )
+
+    def test_recipe_list_contains_nested_data(self):
+        self.create_recipe(self.users[1])
+        response = self.authorized_client.get('/api/recipes/')
+        recipe = response.data['results'][0]
+        self.assertIn('is_subscribed', recipe['author'])
+        self.assertEqual(len(recipe['ingredients']), 3)
+        self.assertEqual(len(recipe['tags']), 2)
+
+
+class RecipePaginationTest(FoodgramTestCase):
+
+    def test_cursor_pages_without_count(self):
+        recipe_ids = [
+            self.create_recipe(self.users[1], number).id
+            for number in range(7)
+        ]
+        seen = []
+        url = '/api/recipes/?cursor=&limit=3'
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.authorized_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any(
+                'COUNT' in query['sql'] for query in context.captured_queries
+            ))
+            seen += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, sorted(recipe_ids, reverse=True))
+
+    def test_invalid_cursor(self):
+        response = self.authorized_client.get('/api/recipes/?cursor=zzz')
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_without_count(self):
+        for number in range(7):
+            self.create_recipe(self.users[1], number)
+        response = self.authorized_client.get(
+            '/api/recipes/?count=false&limit=3&page=3'
+        )
+        self.assertIsNone(response.data['count'])
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn('page=2', response.data['previous'])
+        response = self.authorized_client.get('/api/recipes/?limit=3&page=2')
+        self.assertEqual(response.data['count'], 7)
+        response = self.authorized_client.get('/api/users/?count=false')
+        self.assertIsNone(response.data['count'])
+
+
+class RecipeTagFilterTest(FoodgramTestCase):
+
+    def test_multiple_tags_return_distinct_recipes(self):
+        expected = set()
+        for number, tags in enumerate((
+            self.tags[:2], self.tags[1:], self.tags, self.tags[::2],
+            self.tags[2:], self.tags[:2]
+        )):
+            recipe = self.create_recipe(self.users[1], number)
+            recipe.tags.set(tags)
+            if {self.tags[0], self.tags[1]} & set(tags):
+                expected.add(recipe.id)
+        response = self.guest_client.get(
+            '/api/recipes/?tags=tag0&tags=tag1&limit=100'
+        )
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), expected)
+        self.assertEqual(response.data['count'], len(expected))
+        response = self.guest_client.get(
+            '/api/recipes/?tags=tag0&tags=tag1&limit=2'
+        )
+        self.assertEqual(response.data['count'], len(expected))
+
+    def test_unknown_tag(self):
+        response = self.guest_client.get('/api/recipes/?tags=unknown')
+        self.assertEqual(response.status_code, 400)
+
+
+class RecipeUpdateTest(FoodgramTestCase):
+
+    def recipe_ingredients(self, recipe):
+        return dict(
+            RecipeIngredient.objects.filter(recipe=recipe)
+            .values_list('ingredient_id', 'id')
+        )
+
+    def test_update_keeps_unchanged_rows(self):
+        recipe = self.create_recipe(self.user)
+        before = self.recipe_ingredients(recipe)
+        first, second, third, _, fifth = self.ingredients
+        response = self.authorized_client.patch(
+            f'/api/recipes/{recipe.id}/',
+            self.recipe_payload(
+                ((first, 10), (second, 3), (fifth, 7)), self.tags[1:]
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        after = self.recipe_ingredients(recipe)
+        self.assertEqual(after[first.id], before[first.id])
+        self.assertEqual(after[second.id], before[second.id])
+        self.assertNotIn(third.id, after)
+        self.assertEqual(dict(
+            RecipeIngredient.objects.filter(recipe=recipe)
+            .values_list('ingredient_id', 'amount')
+        ), {first.id: 10, second.id: 3, fifth.id: 7})
+        self.assertEqual(
+            sorted(recipe.tags.values_list('slug', flat=True)),
+            ['tag1', 'tag2']
+        )
+
+    def test_invalid_update_changes_nothing(self):
+        recipe = self.create_recipe(self.user)
+        before = self.recipe_ingredients(recipe)
+        response = self.authorized_client.patch(
+            f'/api/recipes/{recipe.id}/',
+            self.recipe_payload(((self.ingredients[4], 7),), ()),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.recipe_ingredients(recipe), before)
+
+
+class RecipeValidationTest(FoodgramTestCase):
+
+    def test_ingredients_and_tags_are_fetched_once(self):
+        ingredients = [
+            Ingredient.objects.create(name=f'x{number}', measurement_unit='г')
+            for number in range(30)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized_client.post(
+                '/api/recipes/',
+                self.recipe_payload(
+                    [(ingredient, 2) for ingredient in ingredients], self.tags
+                ),
+                format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len([
+            query for query in context.captured_queries
+            if 'FROM "recipes_ingredient"' in query['sql']
+        ]), 1)
+
+    def test_all_missing_ids_are_reported(self):
+        payload = self.recipe_payload(
+            ((self.ingredients[0], 2),), self.tags[:1]
+        )
+        payload['ingredients'] += [
+            {'id': 9999, 'amount': 1}, {'id': 9998, 'amount': 1}
+        ]
+        payload['tags'].append(777)
+        response = self.authorized_client.post(
+            '/api/recipes/', payload, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('9999', response.data['ingredients'][0])
+        self.assertIn('9998', response.data['ingredients'][0])
+        self.assertIn('777', response.data['tags'][0])
+
+    def test_duplicate_ingredient(self):
+        response = self.authorized_client.post(
+            '/api/recipes/',
+            self.recipe_payload(
+                ((self.ingredients[0], 2), (self.ingredients[0], 3)),
+                self.tags[:1]
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Дублируется', response.data['ingredients'][0])
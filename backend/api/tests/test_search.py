@@ -0,0 +1,87 @@
+from unittest import skipUnless
+
+from django.db import connection
+
+from recipes.models import Ingredient, RecipeSearch
+
+from .base import FoodgramTestCase
+
+
+class RecipeSearchTestCase(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.salt = Ingredient.objects.create(
+            name='соль поваренная', measurement_unit='г'
+        )
+        self.borscht = self.post_recipe(
+            'Борщ украинский', 'Варить свеклу', self.ingredients[0]
+        )
+        self.salad = self.post_recipe(
+            'Салат', 'Нарезать борщевик', self.salt
+        )
+        self.soup = self.post_recipe(
+            'Суп', 'Посолить', self.ingredients[1], self.salt
+        )
+
+    def post_recipe(self, name, text, *ingredients):
+        response = self.authorized_client.post(
+            '/api/recipes/',
+            self.recipe_payload(
+                [(ingredient, 2) for ingredient in ingredients],
+                self.tags[:1],
+                name=name,
+                text=text
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def search(self, query):
+        response = self.guest_client.get('/api/recipes/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+
+class RecipeSearchTest(RecipeSearchTestCase):
+
+    def test_prefix_search_and_rank(self):
+        # Совпадение в названии выше совпадения в описании.
+        self.assertEqual(self.search('борщ'), [self.borscht, self.salad])
+        self.assertEqual(set(self.search('соль')), {self.salad, self.soup})
+        self.assertEqual(self.search('салат соль'), [self.salad])
+        self.assertEqual(self.search('"; DROP'), [])
+
+    def test_ingredient_rename_updates_documents(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.name = 'сахар'
+            self.salt.save()
+        self.assertEqual(self.search('соль'), [])
+        self.assertEqual(set(self.search('сахар')), {self.salad, self.soup})
+
+    def test_ingredient_delete_updates_documents(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.delete()
+        self.assertEqual(self.search('соль'), [])
+        self.assertEqual(
+            RecipeSearch.objects.get(recipe_id=self.soup).ingredients,
+            self.ingredients[1].name
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Нужна PostgreSQL')
+class PostgreSQLRecipeSearchTest(RecipeSearchTestCase):
+
+    def test_search_uses_stemmed_vector(self):
+        # tsvector хранит основы слов с весами полей.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT vector::text FROM recipes_recipesearch '
+                'WHERE recipe_id = %s', (self.borscht,)
+            )
+            vector = cursor.fetchone()[0]
+        self.assertIn(":1A", vector)
+        self.assertIn("'свекл':", vector)
+        self.assertEqual(self.search('салаты'), [self.salad])
+        self.assertEqual(self.search('свеклой'), [self.borscht])
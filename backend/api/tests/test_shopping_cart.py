@@ -0,0 +1,210 @@
+import csv
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from pypdf import PdfReader
+
+from api.shopping_cart import PDF_LINES_PER_PAGE
+from recipes.models import Ingredient, ShopingCart, ShopingCartIngredient
+
+from .base import FoodgramTestCase
+
+
+class ShoppingCartAggregateTest(FoodgramTestCase):
+
+    def aggregate(self):
+        return dict(
+            ShopingCartIngredient.objects.filter(user=self.user)
+            .values_list('ingredient__name', 'amount')
+        )
+
+    def check_aggregate(self):
+        output = StringIO()
+        call_command('rebuildshoppingcart', '--check', stdout=output)
+        self.assertIn(': 0', output.getvalue())
+
+    def test_add_update_and_remove_recipes(self):
+        first = self.create_recipe(self.users[1], 1)
+        second = self.create_recipe(self.user, 2)
+        for recipe in (first, second):
+            response = self.authorized_client.post(
+                f'/api/recipes/{recipe.id}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.aggregate(), {
+            'продукт 0': 20, 'продукт 1': 20, 'продукт 2': 20
+        })
+        response = self.authorized_client.patch(
+            f'/api/recipes/{second.id}/',
+            self.recipe_payload(
+                ((self.ingredients[0], 5), (self.ingredients[4], 7)),
+                self.tags[:1]
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.aggregate(), {
+            'продукт 0': 15, 'продукт 1': 10, 'продукт 2': 10, 'продукт 4': 7
+        })
+        self.check_aggregate()
+        response = self.authorized_client.get(
+            '/api/recipes/download_shopping_cart/'
+        )
+        self.assertIn(
+            'Продукт 0 15', b''.join(response.streaming_content).decode()
+        )
+        response = self.authorized_client.delete(
+            f'/api/recipes/{first.id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.aggregate(), {'продукт 0': 5, 'продукт 4': 7})
+        response = self.authorized_client.delete(f'/api/recipes/{second.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.aggregate(), {})
+
+    def add_to_cart(self, *recipes):
+        for recipe in recipes:
+            response = self.authorized_client.post(
+                f'/api/recipes/{recipe.id}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, 201)
+
+    def test_recipe_and_author_deleted_outside_api(self):
+        first = self.create_recipe(self.users[1], 1)
+        second = self.create_recipe(self.users[2], 2)
+        third = self.create_recipe(self.users[2], 3)
+        self.add_to_cart(first, second, third)
+        first.delete()
+        self.assertEqual(self.aggregate(), {
+            'продукт 0': 20, 'продукт 1': 20, 'продукт 2': 20
+        })
+        self.check_aggregate()
+        self.users[2].delete()
+        self.assertEqual(self.aggregate(), {})
+        self.check_aggregate()
+
+    def test_recipe_ingredients_edited_outside_api(self):
+        recipe = self.create_recipe(self.users[1])
+        self.add_to_cart(recipe)
+        first, second, _ = recipe.recipe_ingredients.order_by('id')
+        first.amount = 25
+        first.save()
+        second.ingredient = self.ingredients[4]
+        second.save()
+        recipe.recipe_ingredients.filter(
+            ingredient=self.ingredients[2]
+        ).delete()
+        recipe.recipe_ingredients.create(
+            ingredient=self.ingredients[3], amount=4
+        )
+        self.assertEqual(self.aggregate(), {
+            'продукт 0': 25, 'продукт 3': 4, 'продукт 4': 10
+        })
+        self.check_aggregate()
+        response = self.authorized_client.get(
+            '/api/recipes/download_shopping_cart/'
+        )
+        self.assertIn(
+            'Продукт 0 25', b''.join(response.streaming_content).decode()
+        )
+
+    def test_rebuild_only_mismatched_users(self):
+        recipe = self.create_recipe(self.users[1])
+        self.add_to_cart(recipe)
+        # Корзина вне API: агрегат второго пользователя не заполнен.
+        ShopingCart.objects.create(user=self.users[2], recipe=recipe)
+        stored = set(
+            ShopingCartIngredient.objects.values_list('id', flat=True)
+        )
+        output = StringIO()
+        call_command('rebuildshoppingcart', stdout=output)
+        self.assertIn('Расхождений с корзинами: 3', output.getvalue())
+        self.assertIn('у 1 пользователей', output.getvalue())
+        self.assertTrue(stored < set(
+            ShopingCartIngredient.objects.values_list('id', flat=True)
+        ))
+        self.check_aggregate()
+
+    def test_rebuild_restores_aggregate(self):
+        recipe = self.create_recipe(self.users[1])
+        # bulk_create не вызывает сигналы, агрегат остается пустым.
+        ShopingCart.objects.bulk_create(
+            [ShopingCart(user=self.user, recipe=recipe)]
+        )
+        self.assertEqual(self.aggregate(), {})
+        call_command('rebuildshoppingcart', stdout=StringIO())
+        self.assertEqual(len(self.aggregate()), 3)
+        self.check_aggregate()
+
+
+class ShoppingCartDownloadTest(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        recipe = self.create_recipe(self.users[1])
+        response = self.authorized_client.post(
+            f'/api/recipes/{recipe.id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def download(self, file_format):
+        response = self.authorized_client.get(
+            f'/api/recipes/download_shopping_cart/?format={file_format}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="cart.{file_format}"'
+        )
+        return response, b''.join(response.streaming_content)
+
+    def test_txt(self):
+        response, content = self.download('txt')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertIn('1. Продукт 0 10 г.', content.decode())
+        self.assertIn('1. Рецепт 0', content.decode())
+
+    def test_csv(self):
+        response, content = self.download('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(StringIO(content.decode())))
+        self.assertEqual(
+            rows[0], ['Продукт', 'Количество', 'Единица измерения']
+        )
+        self.assertEqual(rows[1:], [
+            [f'продукт {number}', '10', 'г'] for number in range(3)
+        ])
+
+    def test_pdf(self):
+        response, content = self.download('pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        reader = PdfReader(BytesIO(content), strict=True)
+        self.assertEqual(len(reader.pages), 1)
+        text = reader.pages[0].extract_text()
+        self.assertIn('Продукт 0 10 г.', text)
+        self.assertIn('Список покупок', text)
+
+    def test_pdf_pages_and_long_lines(self):
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'{"очень длинное название " * 5}{number}',
+                measurement_unit='г'
+            ) for number in range(PDF_LINES_PER_PAGE)
+        ]
+        ShopingCartIngredient.objects.bulk_create(
+            ShopingCartIngredient(
+                user=self.user, ingredient=ingredient, amount=1
+            ) for ingredient in ingredients
+        )
+        _, content = self.download('pdf')
+        reader = PdfReader(BytesIO(content), strict=True)
+        self.assertGreater(len(reader.pages), 2)
+        for page in reader.pages:
+            for line in page.extract_text().splitlines():
+                self.assertLessEqual(len(line), 70)
+
+    def test_unknown_format(self):
+        response = self.authorized_client.get(
+            '/api/recipes/download_shopping_cart/?format=xml'
+        )
+        self.assertEqual(response.status_code, 404)
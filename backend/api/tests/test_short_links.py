@@ -0,0 +1,64 @@
+from django.conf import settings
+
+from recipes.converters import MAX_ID, ShortCodeConverter
+from recipes.views import recipe_ids
+
+from .base import FoodgramTestCase
+
+
+class ShortLinkTest(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        recipe_ids.clear()
+        self.recipe = self.create_recipe(self.users[1])
+
+    def test_get_link_redirects(self):
+        response = self.guest_client.get(
+            f'/api/recipes/{self.recipe.id}/get-link/'
+        )
+        self.assertEqual(response.status_code, 200)
+        code = ShortCodeConverter().to_url(self.recipe.id)
+        self.assertTrue(response.data['short-link'].endswith(f'/r/{code}'))
+        response = self.guest_client.get(f'/r/{code}')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], f'/recipes/{self.recipe.id}')
+        self.assertIn(
+            f'max-age={settings.SHORT_LINK_MAX_AGE}',
+            response['Cache-Control']
+        )
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(f'/r/{code}')
+        self.assertEqual(response.status_code, 302)
+
+    def test_legacy_link(self):
+        response = self.guest_client.get(f'/s/{self.recipe.id}')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], f'/recipes/{self.recipe.id}')
+
+    def test_missing_recipe_is_cached(self):
+        missing = self.recipe.id + 1
+        code = ShortCodeConverter().to_url(missing)
+        self.assertEqual(self.guest_client.get(f'/r/{code}').status_code, 404)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(f'/s/{missing}')
+        self.assertEqual(response.status_code, 404)
+        # Сохранение рецепта сбрасывает закешированный ответ.
+        self.create_recipe(self.users[1], 1)
+        self.assertEqual(self.guest_client.get(f'/r/{code}').status_code, 302)
+
+    def test_too_large_id(self):
+        converter = ShortCodeConverter()
+        for url in (
+            f'/r/{converter.to_url(MAX_ID + 1)}',
+            '/r/zzzzzzzzzzz',
+            '/r/zzzzzzzzzzzz',
+            f'/s/{MAX_ID + 1}',
+            '/api/recipes/99999999999999999999/get-link/',
+        ):
+            with self.subTest(url=url):
+                self.assertIn(
+                    self.guest_client.get(url).status_code, (400, 404)
+                )
+        response = self.guest_client.get(f'/r/{converter.to_url(MAX_ID)}')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Subscription
+
+from .base import PASSWORD, FoodgramTestCase
+
+User = get_user_model()
+
+
+class SubscriptionsTest(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.authors = [
+            User.objects.create_user(
+                email=f'author{number}@foodgram.ru',
+                username=f'author{number}',
+                password=PASSWORD,
+                first_name='Имя',
+                last_name='Фамилия'
+            ) for number in range(6)
+        ]
+        for number, author in enumerate(self.authors):
+            for recipe_number in range(3):
+                self.create_recipe(author, number * 3 + recipe_number)
+            Subscription.objects.create(follower=self.user, author=author)
+
+    def subscriptions(self, query):
+        return self.authorized_client.get(
+            f'/api/users/subscriptions/?{query}'
+        )
+
+    def test_query_count_does_not_grow_with_page(self):
+        # Первый запрос кладет пользователя токена в кеш.
+        self.subscriptions('limit=1')
+        counts = []
+        for limit in (2, 6):
+            with CaptureQueriesContext(connection) as context:
+                response = self.subscriptions(f'limit={limit}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), limit)
+            counts.append(len(context))
+        self.assertEqual(counts, [4, 4])
+
+    def test_recipes_limit(self):
+        for recipes_limit, expected in (('0', 0), ('1', 1), ('', 3)):
+            with self.subTest(recipes_limit=recipes_limit):
+                response = self.subscriptions(
+                    f'recipes_limit={recipes_limit}' if recipes_limit else ''
+                )
+                self.assertEqual(response.status_code, 200)
+                for author in response.data['results']:
+                    self.assertEqual(len(author['recipes']), expected)
+                    self.assertEqual(author['recipes_count'], 3)
+
+    def test_invalid_recipes_limit(self):
+        for recipes_limit in ('abc', '-1'):
+            with self.subTest(recipes_limit=recipes_limit):
+                response = self.subscriptions(f'recipes_limit={recipes_limit}')
+                self.assertEqual(response.status_code, 400)
+        response = self.authorized_client.post(
+            f'/api/users/{self.users[1].id}/subscribe/?recipes_limit=abc'
+        )
+        self.assertEqual(response.status_code, 400)
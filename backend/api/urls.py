@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
+from api import async_views
 from api.views import (FoodgramUserViewSet, IngredientViewSet,
                        RecipeViewSet, TagViewSet)
 
@@ -12,7 +14,20 @@ router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('users', FoodgramUserViewSet, basename='users')
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASYNC_VIEWS:
+    # Стоят раньше маршрутов роутера и перекрывают их синхронные версии.
+    urlpatterns += [
+        path('tags/', async_views.tag_list),
+        path('ingredients/', async_views.ingredient_list),
+        path(
+            'recipes/download_shopping_cart/',
+            async_views.download_shopping_cart
+        ),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
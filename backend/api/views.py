@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import FileResponse
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
@@ -11,41 +13,53 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from api.filters import IngredientFilterSet, RecipeFilterSet
-from api.paginators import FoodgramPagination
+from api.cache import CachedResponseMixin
+from api.filters import RecipeFilterSet
+from api.ingredient_index import ingredient_index
+from api.paginators import FoodgramPagination, RecipePagination
 from api.permissions import IsAuthorOrReadOnly
+from api.renderers import SHOPPING_CART_RENDERERS
 from api.serializers import (
-    FoodgramUserSerializer, IngredientSerializer,
+    FoodgramUserSerializer, IngredientSearchSerializer, IngredientSerializer,
     ReadRecipeSerializer, RecipeSerializer, SmallRecipeSerializer,
     UserSubscribingSerializer, TagSerializer
 )
-from api.shopping_cart import form_shopping_cart
+from api.shopping_cart import SHOPPING_CART_FORMATS, shopping_cart_items
+from recipes.converters import MAX_ID
+from recipes.feed import feed_page
 from recipes.models import (
-    Favorite, Ingredient, Recipe, RecipeIngredient,
-    ShopingCart, Subscription, Tag
+    Favorite, Ingredient, Recipe, ShopingCart,
+    ShopingCartIngredient, Subscription, Tag
 )
+from recipes.views import recipe_exists
 
 User = get_user_model()
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_versions = ('tags',)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_versions = ('ingredients',)
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilterSet
+
+    def list(self, request, *args, **kwargs):
+        params = IngredientSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(ingredient_index.search(**params.validated_data))
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_versions = ('recipes', 'users', 'tags', 'ingredients')
+    cache_anonymous_only = True
     serializer_class = RecipeSerializer
-    pagination_class = FoodgramPagination
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilterSet
     permission_classes = (
@@ -53,6 +67,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permissions.IsAuthenticatedOrReadOnly
     )
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return Recipe.objects.with_related(self.request.user)
+        return Recipe.objects.all()
+
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return ReadRecipeSerializer
@@ -63,12 +82,21 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     @staticmethod
     def favorite_and_shopping_add(pk, model, request, message):
-        item, created = model.objects.get_or_create(
-            user=request.user,
-            recipe=get_object_or_404(Recipe, id=pk)
-        )
-        if not created:
-            raise ValidationError(f'Данный рецепт уже в {message}!')
+        recipe = get_object_or_404(Recipe, id=pk)
+        with transaction.atomic():
+            item, created = model.objects.get_or_create(
+                user=request.user,
+                recipe=recipe
+            )
+            if not created:
+                raise ValidationError(f'Данный рецепт уже в {message}!')
+            Recipe.objects.filter(id=recipe.id).update(
+                **{model.counter_field: F(model.counter_field) + 1}
+            )
+            if model is ShopingCart:
+                ShopingCartIngredient.objects.add_recipe(
+                    [request.user.id], recipe
+                )
         return Response(
             SmallRecipeSerializer(item.recipe).data,
             status=status.HTTP_201_CREATED
@@ -76,7 +104,17 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     @staticmethod
     def favorite_and_shopping_delete(pk, model, request, message):
-        get_object_or_404(model, user=request.user, recipe_id=pk).delete()
+        item = get_object_or_404(model, user=request.user, recipe_id=pk)
+        with transaction.atomic():
+            item.delete()
+            # Счетчик мог разойтись с таблицей, ниже нуля он не уходит.
+            Recipe.objects.filter(id=pk).update(**{
+                model.counter_field: Greatest(F(model.counter_field) - 1, 0)
+            })
+            if model is ShopingCart:
+                ShopingCartIngredient.objects.remove_recipe(
+                    [request.user.id], pk
+                )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -114,24 +152,21 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         methods=['get'],
-        permission_classes=[permissions.IsAuthenticated]
+        permission_classes=[permissions.IsAuthenticated],
+        renderer_classes=SHOPPING_CART_RENDERERS
     )
     def download_shopping_cart(self, request):
-        shoping_cart = ShopingCart.objects.filter(
-            user=request.user
-        ).values('recipe', 'recipe__name')
-        recipes = [item['recipe'] for item in shoping_cart]
-        recipes_names = [item['recipe__name'] for item in shoping_cart]
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__in=recipes
-        ).values('ingredient__name', 'ingredient__measurement_unit').annotate(
-            amount=Sum('amount')
-        ).order_by('ingredient__name')
-        return FileResponse(
-            form_shopping_cart(recipes_names, ingredients),
-            as_attachment=True,
-            filename='cart.txt'
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            SHOPPING_CART_FORMATS[renderer.format](
+                *shopping_cart_items(request.user)
+            ),
+            content_type=renderer.media_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="cart.{renderer.format}"'
         )
+        return response
 
     @action(
         detail=True,
@@ -140,7 +175,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.AllowAny]
     )
     def get_link(self, request, pk):
-        if not Recipe.objects.filter(id=pk).exists():
+        if (
+            not pk.isdigit() or int(pk) > MAX_ID
+            or not recipe_exists(int(pk))
+        ):
             raise ValidationError(
                 f'Рецепта с id {pk} не существует!'
             )
@@ -152,7 +190,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
 
-class FoodgramUserViewSet(UserViewSet):
+class FoodgramUserViewSet(CachedResponseMixin, UserViewSet):
+    cache_versions = ('users',)
+    cache_anonymous_only = True
     queryset = User.objects.all()
     serializer_class = FoodgramUserSerializer
     pagination_class = FoodgramPagination
@@ -181,48 +221,85 @@ class FoodgramUserViewSet(UserViewSet):
         serializer.is_valid()
         serializer.save()
         return Response(
-            {'avatar': serializer.data['avatar']},
+            {
+                'avatar': serializer.data['avatar'],
+                'avatar_renditions': serializer.data['avatar_renditions']
+            },
             status=status.HTTP_200_OK
         )
 
     @avatar.mapping.delete
     def avatar_delete(self, request):
-        if request.user.avatar is None:
+        if not request.user.avatar:
             raise ValidationError('Аватар не установлен!')
-        request.user.avatar.delete()
+        # Файл может быть аватаром других пользователей или изображением
+        # рецепта, оставшиеся без ссылок файлы удаляет collectmedia.
         request.user.avatar = None
-        request.user.save()
+        request.user.save(update_fields=('avatar',))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit is None:
+            return None
+        if not recipes_limit.isdigit():
+            raise ValidationError(
+                'recipes_limit должен быть неотрицательным целым числом!'
+            )
+        return int(recipes_limit)
+
     @action(
         detail=False,
         methods=['get'],
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, request):
-        subscriptions_items = request.user.followers.all()
-        subscriptions = [
-            subscription.author for subscription in subscriptions_items
-        ]
-        paginator = self.paginate_queryset(subscriptions)
+        authors = self.paginate_queryset(
+            User.objects.filter(
+                authors__follower=request.user
+            ).with_recipes(self.get_recipes_limit()).order_by('username')
+        )
         return self.get_paginated_response(
             UserSubscribingSerializer(
-                paginator,
+                authors,
                 context={'request': request},
                 many=True
             ).data
         )
 
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        # Лента рецептов авторов из подписок, страницы по курсору.
+        paginator = RecipePagination()
+        keys = paginator.paginate_keys(
+            request,
+            lambda cursor, size: feed_page(request.user, cursor, size)
+        )
+        recipes = Recipe.objects.with_related(request.user).in_bulk(
+            [recipe_id for _, recipe_id in keys]
+        )
+        # Рецепт мог быть удален между чтением ленты и загрузкой.
+        return paginator.get_paginated_response(ReadRecipeSerializer(
+            [recipes[key] for _, key in keys if key in recipes],
+            context=self.get_serializer_context(),
+            many=True
+        ).data)
+
     @action(
         detail=True,
         methods=['post'],
         permission_classes=[IsAuthenticated]
     )
     def subscribe(self, request, id):
+        recipes_limit = self.get_recipes_limit()
         author = get_object_or_404(User, id=id)
         if author == request.user:
             raise ValidationError('Нельзя подписаться на самого себя!')
-        subscription, created = Subscription.objects.get_or_create(
+        _, created = Subscription.objects.get_or_create(
             follower=request.user,
             author=author
         )
@@ -232,7 +309,7 @@ class FoodgramUserViewSet(UserViewSet):
             )
         return Response(
             UserSubscribingSerializer(
-                subscription.author,
+                User.objects.with_recipes(recipes_limit).get(id=author.id),
                 context={
                     'request': request,
                 }
@@ -241,5 +318,7 @@ class FoodgramUserViewSet(UserViewSet):
 
     @subscribe.mapping.delete
     def subscribe_delete(self, request, id):
-        get_object_or_404(Subscription, follower=request.user, author_id=id)
+        get_object_or_404(
+            Subscription, follower=request.user, author_id=id
+        ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,158 @@
+from functools import partial
+from queue import Empty, LifoQueue
+from threading import BoundedSemaphore, Lock
+
+from django.db.backends.postgresql.base import \
+    DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.db.backends.postgresql.creation import \
+    DatabaseCreation as PostgreSQLDatabaseCreation
+from django.db.utils import OperationalError
+from psycopg2 import Error as DatabaseError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+pools = {}
+pools_lock = Lock()
+
+
+# Пул соединений процесса, общий для потоков gunicorn. Соединение
+# занимает место в пуле, пока оно выдано потоку, свободные соединения
+# хранятся открытыми и выдаются повторно.
+class ConnectionPool:
+
+    def __init__(self, size, timeout):
+        self.timeout = timeout
+        self.slots = BoundedSemaphore(size)
+        self.idle = LifoQueue()
+
+    @staticmethod
+    def is_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return False
+        return True
+
+    def acquire(self, connect, health_checks):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError('Нет свободных соединений в пуле')
+        try:
+            while True:
+                try:
+                    connection = self.idle.get_nowait()
+                except Empty:
+                    return connect()
+                if not connection.closed and (
+                    not health_checks or self.is_usable(connection)
+                ):
+                    return connection
+                connection.close()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def clear(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except Empty:
+                return
+
+    def release(self, connection):
+        # Незавершенная транзакция откатывается, а соединение, которое
+        # не удалось вернуть в исходное состояние, закрывается.
+        try:
+            if not connection.closed and (
+                connection.info.transaction_status != TRANSACTION_STATUS_IDLE
+            ):
+                connection.rollback()
+        except DatabaseError:
+            connection.close()
+        if not connection.closed:
+            self.idle.put(connection)
+        self.slots.release()
+
+
+def pool_key(alias, settings_dict):
+    # Тесты меняют имя базы у того же псевдонима, поэтому пул
+    # привязан к базе, а не только к псевдониму.
+    return alias, *(
+        settings_dict.get(name) for name in ('NAME', 'HOST', 'PORT', 'USER')
+    )
+
+
+def clear_pool(alias, settings_dict):
+    with pools_lock:
+        pool = pools.pop(pool_key(alias, settings_dict), None)
+    if pool is not None:
+        pool.clear()
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Свободные соединения пула не дадут удалить тестовую базу.
+        clear_pool(self.connection.alias, {
+            **self.connection.settings_dict, 'NAME': test_database_name
+        })
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    # POOL_SIZE включает пул, HEALTH_CHECKS - проверку соединения,
+    # оставшегося с прошлого запроса, перед первым использованием.
+    creation_class = DatabaseCreation
+    health_check_done = False
+
+    def get_pool(self):
+        size = self.settings_dict.get('POOL_SIZE')
+        if not size:
+            return None
+        key = pool_key(self.alias, self.settings_dict)
+        with pools_lock:
+            if key not in pools:
+                pools[key] = ConnectionPool(
+                    size, self.settings_dict.get('POOL_TIMEOUT')
+                )
+            return pools[key]
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.acquire(
+            partial(super().get_new_connection, conn_params),
+            self.settings_dict.get('HEALTH_CHECKS')
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+        pool.release(self.connection)
+
+    def connect(self):
+        # Свежее соединение не проверяется: connect() сам вызывает
+        # ensure_connection() до перевода соединения в autocommit.
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('HEALTH_CHECKS')
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
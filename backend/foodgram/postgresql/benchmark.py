@@ -0,0 +1,117 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+# Сравнение числа запросов в секунду к PostgreSQL без сохранения
+# соединений, с постоянными соединениями и с пулом. Каждый режим
+# запускает gunicorn с одинаковыми воркерами и потоками, кеш ответов
+# отключен, чтобы каждый запрос доходил до базы. Параметры подключения
+# берутся из тех же переменных окружения, что и в settings.py.
+#
+#   cd backend
+#   python manage.py migrate
+#   python -m foodgram.postgresql.benchmark --requests 5000
+
+MODES = {
+    'без сохранения соединений': {'DB_CONN_MAX_AGE': '0'},
+    'постоянные соединения': {'DB_CONN_MAX_AGE': '60'},
+    'пул соединений': {'DB_POOL_SIZE': '{threads}'},
+}
+
+PATHS = ('/api/tags/', '/api/recipes/?limit=1')
+
+
+def start_server(mode_env, options):
+    env = {
+        **os.environ,
+        'DEBUG': 'False',
+        'API_CACHE_TIMEOUT': '0',
+        'DB_POOL_SIZE': '0',
+        **{
+            name: value.format(threads=options.threads)
+            for name, value in mode_env.items()
+        },
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn',
+            '--bind', f'127.0.0.1:{options.port}',
+            '--workers', str(options.workers),
+            '--threads', str(options.threads),
+            '--log-level', 'warning',
+            'foodgram.wsgi:application',
+        ],
+        env=env
+    )
+    for _ in range(100):
+        try:
+            request(options.port, PATHS[0])
+            return server
+        except OSError:
+            time.sleep(0.1)
+    stop_server(server)
+    raise RuntimeError('gunicorn не запустился')
+
+
+def stop_server(server):
+    server.send_signal(signal.SIGTERM)
+    server.wait()
+
+
+def request(port, path, connection=None):
+    connection = connection or HTTPConnection('127.0.0.1', port, timeout=10)
+    connection.request('GET', path, headers={'Host': 'localhost'})
+    response = connection.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f'{path}: {response.status}')
+    return connection
+
+
+def run_client(port, count):
+    # Клиент держит keep-alive, чтобы мерить соединения с базой,
+    # а не установку HTTP-соединений.
+    connection = None
+    for number in range(count):
+        connection = request(port, PATHS[number % len(PATHS)], connection)
+
+
+def measure(options):
+    per_client = options.requests // options.clients
+    with ThreadPoolExecutor(max_workers=options.clients) as executor:
+        started = time.monotonic()
+        for result in [
+            executor.submit(run_client, options.port, per_client)
+            for _ in range(options.clients)
+        ]:
+            result.result()
+    return per_client * options.clients / (time.monotonic() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--port', type=int, default=8099)
+    options = parser.parse_args()
+    for mode, mode_env in MODES.items():
+        server = start_server(mode_env, options)
+        try:
+            measure(argparse.Namespace(**{
+                **vars(options), 'requests': options.clients * 10
+            }))
+            rate = measure(options)
+        finally:
+            stop_server(server)
+        print(f'{mode}: {rate:.0f} запросов/с')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,14 +7,23 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+
 POSTGRE = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'foodgram.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        # С пулом соединение возвращается в пул после каждого запроса.
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_SIZE else int(os.getenv('DB_CONN_MAX_AGE', 60))
+        ),
+        'HEALTH_CHECKS': os.getenv('DB_HEALTH_CHECKS', 'True') == 'True',
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10))
     }
 }
 
@@ -29,6 +38,8 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-lc7vo*gp^^)1-am*5*#m(-k8qh
 
 DEBUG = os.getenv('DEBUG') == 'True'
 
+ASYNC_VIEWS = os.getenv('SERVER_MODE') == 'asgi'
+
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost').split(', ')
 
 
@@ -112,6 +123,14 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = '/media'
 
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+IMAGE_RENDITION_QUALITY = int(os.getenv('IMAGE_RENDITION_QUALITY', 80))
+
+IMAGE_READY_CACHE_SIZE = int(os.getenv('IMAGE_READY_CACHE_SIZE', 10000))
+
+IMAGE_READY_CACHE_TTL = int(os.getenv('IMAGE_READY_CACHE_TTL', 3600))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -120,7 +139,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -142,3 +161,60 @@ DJOSER = {
 }
 
 AUTH_USER_MODEL = 'recipes.FoodgramUser'
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        BASE_DIR / 'cache'
+    ),
+    'redis': ('django_redis.cache.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+
+CACHE_BACKEND, CACHE_LOCATION = CACHE_BACKENDS[
+    os.getenv('CACHE_BACKEND', 'locmem')
+]
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_LOCATION),
+        'KEY_PREFIX': 'foodgram',
+    }
+}
+
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+
+API_CACHE_MAX_AGE = int(os.getenv('API_CACHE_MAX_AGE', 60))
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+
+# Кеш locmem у каждого процесса свой, и удаленный токен продолжает
+# работать в других процессах до истечения этого срока.
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv(
+    'AUTH_TOKEN_CACHE_TIMEOUT',
+    10 if os.getenv('CACHE_BACKEND', 'locmem') == 'locmem' else 300
+))
+
+COOKING_TIME_BORDERS = tuple(
+    int(border) for border in
+    os.getenv('COOKING_TIME_BORDERS', '5, 30').split(',')
+)
+
+ADMIN_COUNTS_CACHE_TIMEOUT = int(os.getenv('ADMIN_COUNTS_CACHE_TIMEOUT', 60))
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 10000))
+
+FEED_WORKERS = int(os.getenv('FEED_WORKERS', 2))
+
+FEED_MAX_ITEMS = int(os.getenv('FEED_MAX_ITEMS', 500))
+
+FEED_POPULAR_TIMEOUT = int(os.getenv('FEED_POPULAR_TIMEOUT', 300))
+
+SHORT_LINK_CACHE_SIZE = int(os.getenv('SHORT_LINK_CACHE_SIZE', 10000))
+
+SHORT_LINK_CACHE_TTL = int(os.getenv('SHORT_LINK_CACHE_TTL', 300))
+
+SHORT_LINK_NEGATIVE_TTL = int(os.getenv('SHORT_LINK_NEGATIVE_TTL', 30))
+
+SHORT_LINK_MAX_AGE = int(os.getenv('SHORT_LINK_MAX_AGE', 3600))
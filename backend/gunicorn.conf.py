@@ -0,0 +1,11 @@
+import os
+
+# SERVER_MODE=asgi запускает приложение через воркеры uvicorn, иначе
+# используются обычные синхронные воркеры gunicorn.
+bind = '0.0.0.0:8080'
+
+if os.getenv('SERVER_MODE') == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'foodgram.asgi:application'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
@@ -0,0 +1,20 @@
+# Периодическое обслуживание базы и медиа, запускается сервисом
+# maintenance из docker-compose.production.yml. Каждая команда чинит
+# только найденные расхождения, поэтому повторный запуск безопасен.
+while true; do
+    # Счетчики избранного и корзин меняет API, изменения в обход него
+    # (админка, bulk_create) сверяются здесь.
+    python manage.py reconcilecounters
+    # Агрегат списка покупок ведут сигналы, корзины, измененные в обход
+    # моделей (bulk_create, update), сверяются здесь.
+    python manage.py rebuildshoppingcart
+    # Ленты обрезаются при подписке, а новые рецепты авторов только
+    # дописываются в них, поэтому длинные ленты сокращаются здесь.
+    python manage.py trimfeeds
+    # Хранилище раскладывает файлы по содержимому, один файл может
+    # принадлежать нескольким записям, поэтому удаление рецепта или
+    # смена аватара файлов не трогает. Сироты старше суток удаляются
+    # здесь, более свежие могут относиться к незавершенной загрузке.
+    python manage.py collectmedia --min-age 24
+    sleep "${MAINTENANCE_INTERVAL:-86400}"
+done
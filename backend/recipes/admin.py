@@ -1,13 +1,18 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models import (Count, IntegerField, OuterRef, Prefetch, Q,
+                              Subquery)
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
 from recipes.models import (Favorite, Ingredient, Recipe,
-                            RecipeIngredient, ShopingCart,
+                            RecipeIngredient, RecipeSearch, ShopingCart,
                             Subscription, Tag)
 
 
@@ -16,47 +21,89 @@ User = get_user_model()
 admin.site.unregister(Group)
 
 
+def count_subquery(queryset, field):
+    # Коррелированный подзапрос вместо Count через JOIN: несколько таких
+    # счетчиков в одном списке не размножают строки друг друга.
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('*')).values('count'),
+        output_field=IntegerField()
+    ), 0)
+
+
 class CookingTimeFilter(admin.SimpleListFilter):
     title = 'Время приготовления'
     parameter_name = 'cooking_time'
-    MIDDLE_BORDER = 5
-    LONG_BORDER = 30
-    QUERYSET_VALUES = dict(
-        quick=(0, MIDDLE_BORDER),
-        middle=(MIDDLE_BORDER + 1, LONG_BORDER),
-        long=(LONG_BORDER + 1, 10**10)
-    )
+
+    @staticmethod
+    def ranges():
+        # Границы COOKING_TIME_BORDERS делят время на промежутки,
+        # последний из них открыт сверху.
+        borders = sorted(settings.COOKING_TIME_BORDERS)
+        return {
+            f'{low}-{"" if high is None else high}': (low, high)
+            for low, high in zip(
+                (0, *(border + 1 for border in borders)), (*borders, None)
+            )
+        }
+
+    def counts(self, model):
+        # Все промежутки считаются одним проходом по таблице.
+        key = f'admin:cooking_time:{settings.COOKING_TIME_BORDERS}'
+        counts = cache.get(key)
+        if counts is None:
+            counts = model._default_manager.aggregate(**{
+                value: Count('id', filter=self.range_filter(value))
+                for value in self.ranges()
+            })
+            cache.set(key, counts, settings.ADMIN_COUNTS_CACHE_TIMEOUT)
+        return counts
+
+    def range_filter(self, value):
+        low, high = self.ranges()[value]
+        if high is None:
+            return Q(cooking_time__gte=low)
+        return Q(cooking_time__range=(low, high))
 
     def lookups(self, request, model_admin):
-        count_list = [
-            model_admin.get_queryset(request).filter(
-                cooking_time__range=value
-            ).count() for value in self.QUERYSET_VALUES.values()
-        ]
-        return (
-            ('quick',
-             f'Быстрее {self.MIDDLE_BORDER+1} мин. ({count_list[0]})'),
-            ('middle', f'Быстрее {self.LONG_BORDER+1} мин. ({count_list[1]})'),
-            ('long', f'{self.LONG_BORDER+1} мин. и дольше ({count_list[2]})')
-        )
+        counts = self.counts(model_admin.model)
+        lookups = []
+        for value, (low, high) in self.ranges().items():
+            label = (
+                f'{low} мин. и дольше' if high is None
+                else f'Быстрее {high + 1} мин.'
+            )
+            lookups.append((value, f'{label} ({counts[value]})'))
+        return lookups
 
     def queryset(self, request, queryset):
-        if self.value() in self.QUERYSET_VALUES:
-            return queryset.filter(
-                cooking_time__range=self.QUERYSET_VALUES.get(self.value())
-            )
+        if self.value() in self.ranges():
+            return queryset.filter(self.range_filter(self.value()))
         return queryset
 
 
 class RecipeCountMixin():
+    recipe_count_queryset = None
+    recipe_count_field = None
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipe_count=count_subquery(
+                self.recipe_count_queryset, self.recipe_count_field
+            )
+        )
 
-    @admin.display(description='Рецепты')
+    @admin.display(description='Рецепты', ordering='recipe_count')
     def recipe_count(self, model):
-        return model.recipes.count()
+        return model.recipe_count
 
 
 @admin.register(Ingredient)
 class IngridientAdmin(RecipeCountMixin, admin.ModelAdmin):
+    recipe_count_queryset = RecipeIngredient.objects.all()
+    recipe_count_field = 'ingredient'
     list_display = ('name', 'measurement_unit', 'recipe_count')
     list_filter = ('measurement_unit', )
     search_fields = ('name', 'measurement_unit',)
@@ -68,10 +115,13 @@ class IngredientsInLine(admin.StackedInline):
     extra = 0
     verbose_name = 'Продукт'
     verbose_name_plural = 'Продукты'
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Tag)
 class TagAdmin(RecipeCountMixin, admin.ModelAdmin):
+    recipe_count_queryset = Recipe.tags.through.objects.all()
+    recipe_count_field = 'tag'
     list_display = ('name', 'slug', 'recipe_count')
     search_fields = ('name', 'slug', )
 
@@ -79,11 +129,15 @@ class TagAdmin(RecipeCountMixin, admin.ModelAdmin):
 @admin.register(Favorite, ShopingCart)
 class FavoriteAndCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe', )
+    list_select_related = ('user', 'recipe')
+    show_full_result_count = False
 
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ('follower', 'author')
+    list_select_related = ('follower', 'author')
+    show_full_result_count = False
 
 
 @admin.register(Recipe)
@@ -95,29 +149,41 @@ class RecipeAdmin(admin.ModelAdmin):
         'author__last_name', 'author__username', 'tags__name'
     )
     list_filter = ['tags', 'author', CookingTimeFilter]
-    readonly_fields = ('image_override',)
+    readonly_fields = ('image_override', 'favorites_count', 'in_carts_count')
     inlines = (IngredientsInLine, )
+    list_select_related = ('author',)
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        RecipeSearch.objects.update_documents((form.instance.id,))
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
 
-    @admin.display(description='Избранное')
+    @admin.display(description='Избранное', ordering='favorites_count')
     def favorite_count(self, recipe):
-        return recipe.favorites.count()
+        return recipe.favorites_count
 
     @admin.display(description='Теги')
     @mark_safe
     def tags_override(self, recipe):
-        return '<br>'.join(recipe.tags.values_list('name', flat=True))
+        return '<br>'.join(tag.name for tag in recipe.tags.all())
 
     @admin.display(description='Продукты')
     @mark_safe
     def ingredients_override(self, recipe):
-        return '<br>'.join([
-            '{ingredient__name} {ingredient__measurement_unit} {amount}'
-            .format(
-                **ingredient
-            ) for ingredient in recipe.recipe_ingredients.values(
-                'ingredient__name', 'ingredient__measurement_unit', 'amount'
-            )
-        ])
+        return '<br>'.join(
+            f'{item.ingredient.name} {item.ingredient.measurement_unit} '
+            f'{item.amount}' for item in recipe.recipe_ingredients.all()
+        )
 
     @admin.display(description='Изображение')
     def image_override(self, recipe):
@@ -187,6 +253,7 @@ class FoodgramUserAdmin(UserAdmin):
     readonly_fields = ('avatar_override', 'password_change')
     list_filter = (FollowersFilter, AuthorsFilter, RecipesFilter)
     ordering = ('username',)
+    show_full_result_count = False
     fieldsets = (
         (None, {'fields': ('username',)}),
         (_('Personal info'), {'fields': (
@@ -201,6 +268,17 @@ class FoodgramUserAdmin(UserAdmin):
         (_('Important dates'), {'fields': ('last_login', 'date_joined')}),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            followers_count=count_subquery(
+                Subscription.objects.all(), 'follower'
+            ),
+            authors_count=count_subquery(
+                Subscription.objects.all(), 'author'
+            ),
+            recipe_count=count_subquery(Recipe.objects.all(), 'author')
+        )
+
     @admin.display(description='Изменение пароля')
     @mark_safe
     def password_change(self, user):
@@ -211,22 +289,21 @@ class FoodgramUserAdmin(UserAdmin):
     def full_name(self, user):
         return f'{user.first_name} {user.last_name}'
 
-    @admin.display(description='Подписчики')
+    @admin.display(description='Подписчики', ordering='followers_count')
     def followers_count(self, user):
-        return user.followers.count()
+        return user.followers_count
 
-    @admin.display(description='Подписки')
+    @admin.display(description='Подписки', ordering='authors_count')
     def authors_count(self, user):
-        return user.authors.count()
+        return user.authors_count
 
-    @admin.display(description='Рецепты')
+    @admin.display(description='Рецепты', ordering='recipe_count')
     @mark_safe
     def recipe_count(self, user):
-        count = user.recipes.count()
-        if count > 0:
+        if user.recipe_count > 0:
             url = f'{reverse("api:recipes-list")}?author={user.id}'
-            return f'<a href="{url}">{count}</a>'
-        return count
+            return f'<a href="{url}">{user.recipe_count}</a>'
+        return user.recipe_count
 
     @admin.display(description='Аватар')
     def avatar_override(self, user):
@@ -0,0 +1,39 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+# LRU-кеш в памяти процесса со сроком жизни записей. Срок задается
+# при записи, чтобы отрицательные ответы хранились меньше положительных.
+class TTLCache:
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.lock = Lock()
+        self.items = OrderedDict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return default
+            if item[0] < monotonic():
+                del self.items[key]
+                return default
+            self.items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.items[key] = (monotonic() + ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
@@ -0,0 +1,35 @@
+import re
+
+from django.urls.converters import IntConverter
+from shortuuid import get_alphabet
+from shortuuid.main import int_to_string, string_to_int
+
+ALPHABET = get_alphabet()
+
+# Наибольший id, который можно передать в запрос (bigint). Ссылки с
+# большими числами не совпадают с маршрутом и отдают 404.
+MAX_ID = 2 ** 63 - 1
+
+
+def check_id(id):
+    if id > MAX_ID:
+        raise ValueError(f'id {id} больше {MAX_ID}')
+    return id
+
+
+# id рецепта в короткой ссылке записывается в алфавите shortuuid
+# (base57 без похожих символов): 100000 превращается в 'YnQ'.
+class ShortCodeConverter:
+    regex = f'[{re.escape("".join(ALPHABET))}]{{1,11}}'
+
+    def to_python(self, value):
+        return check_id(string_to_int(value, ALPHABET))
+
+    def to_url(self, value):
+        return int_to_string(int(value), ALPHABET)
+
+
+class IdConverter(IntConverter):
+
+    def to_python(self, value):
+        return check_id(super().to_python(value))
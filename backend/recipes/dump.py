@@ -0,0 +1,110 @@
+import csv
+import gzip
+import json
+import os
+from datetime import date, datetime, time
+
+from django.contrib.auth import get_user_model
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShopingCart, Subscription, Tag)
+
+User = get_user_model()
+
+# Таблицы графа рецептов в порядке загрузки (сначала те, на которые
+# ссылаются остальные) и поля, которые в выгрузку не попадают.
+TABLES = {
+    'users': (User, ('password',)),
+    'tags': (Tag, ()),
+    'ingredients': (Ingredient, ()),
+    'recipes': (Recipe, ()),
+    'recipe_tags': (Recipe.tags.through, ()),
+    'recipe_ingredients': (RecipeIngredient, ()),
+    'favorites': (Favorite, ()),
+    'shopping_carts': (ShopingCart, ()),
+    'subscriptions': (Subscription, ()),
+}
+
+FORMATS = ('jsonl', 'csv')
+
+GZIP_LEVEL = 6
+
+
+def table_fields(table):
+    model, excluded = TABLES[table]
+    return [
+        field for field in model._meta.concrete_fields
+        if field.name not in excluded
+    ]
+
+
+def file_name(table, file_format, compress):
+    return f'{table}.{file_format}{".gz" if compress else ""}'
+
+
+def open_file(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(
+            path, f'{mode}t', encoding='utf-8', newline='',
+            **({'compresslevel': GZIP_LEVEL} if mode == 'w' else {})
+        )
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def find_file(directory, table):
+    for file_format in FORMATS:
+        for compress in (False, True):
+            path = os.path.join(
+                directory, file_name(table, file_format, compress)
+            )
+            if os.path.exists(path):
+                return path, file_format
+    return None, None
+
+
+def dump_value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def write_rows(file, file_format, names, rows):
+    count = 0
+    if file_format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(names)
+        for row in rows:
+            # Пустая ячейка csv означает NULL.
+            writer.writerow(
+                '' if value is None else dump_value(value) for value in row
+            )
+            count += 1
+    else:
+        for row in rows:
+            file.write(json.dumps(
+                dict(zip(names, map(dump_value, row))), ensure_ascii=False
+            ))
+            file.write('\n')
+            count += 1
+    return count
+
+
+def read_rows(file, file_format, fields):
+    by_name = {field.attname: field for field in fields}
+    if file_format == 'csv':
+        reader = csv.reader(file)
+        names = next(reader, [])
+        for row in reader:
+            yield {
+                name: (
+                    None if value == '' and by_name[name].null
+                    else by_name[name].to_python(value)
+                ) for name, value in zip(names, row)
+            }
+    else:
+        for line in file:
+            if line.strip():
+                yield {
+                    name: by_name[name].to_python(value)
+                    for name, value in json.loads(line).items()
+                }
@@ -0,0 +1,163 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from recipes.models import FeedItem, Recipe, Subscription
+
+# Лента подписок хранится по записи на подписчика (fan-out on write).
+# Рецепты авторов, у которых больше FEED_FANOUT_LIMIT подписчиков, в
+# ленты не раскладываются, а подмешиваются при чтении.
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+POPULAR_AUTHORS_KEY = 'feed:popular_authors'
+
+
+def popular_author_ids():
+    author_ids = cache.get(POPULAR_AUTHORS_KEY)
+    if author_ids is None:
+        author_ids = set(Subscription.objects.values('author').annotate(
+            followers=Count('id')
+        ).filter(
+            followers__gt=settings.FEED_FANOUT_LIMIT
+        ).values_list('author', flat=True))
+        cache.set(
+            POPULAR_AUTHORS_KEY, author_ids, settings.FEED_POPULAR_TIMEOUT
+        )
+    return author_ids
+
+
+def is_popular(author_id):
+    return Subscription.objects.filter(
+        author_id=author_id
+    )[settings.FEED_FANOUT_LIMIT:].exists()
+
+
+def fan_out(recipe):
+    if is_popular(recipe.author_id):
+        return
+    items = (
+        FeedItem(user_id=user_id, recipe=recipe, pub_date=recipe.pub_date)
+        for user_id in Subscription.objects.filter(
+            author_id=recipe.author_id
+        ).values_list('follower', flat=True).iterator()
+    )
+    while batch := list(islice(items, BATCH_SIZE)):
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+# Раскладка идет после коммита: в пуле потоков, а без воркеров
+# (FEED_WORKERS=0) прямо в запросе, но уже вне его транзакции.
+executor = (
+    ThreadPoolExecutor(
+        max_workers=settings.FEED_WORKERS, thread_name_prefix='feed'
+    ) if settings.FEED_WORKERS else None
+)
+
+
+def fan_out_logged(recipe_id):
+    # Рецепт перечитывается: до раскладки его могли изменить или удалить.
+    try:
+        recipe = Recipe.objects.filter(pk=recipe_id).first()
+        if recipe is not None:
+            fan_out(recipe)
+    except Exception:
+        logger.exception('Не удалось разложить рецепт %s по лентам', recipe_id)
+
+
+def fan_out_in_worker(recipe_id):
+    try:
+        fan_out_logged(recipe_id)
+    finally:
+        # Потоки пула не получают request_finished, соединение с базой
+        # закрывается здесь.
+        connection.close()
+
+
+def schedule_fan_out(recipe_id):
+    if executor is None:
+        transaction.on_commit(lambda: fan_out_logged(recipe_id))
+    else:
+        transaction.on_commit(
+            lambda: executor.submit(fan_out_in_worker, recipe_id)
+        )
+
+
+def follow(follower_id, author_id):
+    if is_popular(author_id):
+        return
+    FeedItem.objects.bulk_create((
+        FeedItem(user_id=follower_id, recipe_id=recipe_id, pub_date=pub_date)
+        for recipe_id, pub_date in Recipe.objects.filter(
+            author_id=author_id
+        ).values_list('id', 'pub_date')[:settings.FEED_MAX_ITEMS]
+    ), ignore_conflicts=True)
+    # Подписка добавляет до FEED_MAX_ITEMS записей сразу, поэтому лента
+    # обрезается здесь же. Ленты, выросшие от новых рецептов, обрезает
+    # trimfeeds по расписанию.
+    trim_feed(follower_id)
+
+
+def unfollow(follower_id, author_id):
+    FeedItem.objects.filter(
+        user_id=follower_id, recipe__author_id=author_id
+    ).delete()
+
+
+def after(cursor, date_field, id_field):
+    pub_date, recipe_id = cursor
+    return Q(**{f'{date_field}__lt': pub_date}) | Q(**{
+        date_field: pub_date, f'{id_field}__lt': recipe_id
+    })
+
+
+def feed_page(user, cursor, size):
+    # Обе выборки идут по индексам в порядке (pub_date, id) убывания,
+    # из каждой берется не больше size + 1 строк и результаты сливаются.
+    items = FeedItem.objects.filter(user=user)
+    if cursor is not None:
+        items = items.filter(after(cursor, 'pub_date', 'recipe_id'))
+    keys = dict(
+        (recipe_id, pub_date) for pub_date, recipe_id in items.order_by(
+            '-pub_date', '-recipe_id'
+        ).values_list('pub_date', 'recipe_id')[:size + 1]
+    )
+    popular_ids = popular_author_ids()
+    if popular_ids:
+        recipes = Recipe.objects.filter(
+            author__in=Subscription.objects.filter(
+                follower=user, author_id__in=popular_ids
+            ).values('author')
+        )
+        if cursor is not None:
+            recipes = recipes.filter(after(cursor, 'pub_date', 'id'))
+        for recipe_id, pub_date in recipes.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', 'pub_date')[:size + 1]:
+            keys[recipe_id] = max(pub_date, keys.get(recipe_id, pub_date))
+    page = sorted(
+        ((pub_date, recipe_id) for recipe_id, pub_date in keys.items()),
+        reverse=True
+    )
+    return page[:size], len(page) > size
+
+
+def trim_feed(user_id):
+    boundary = FeedItem.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-recipe_id'
+    ).values_list('pub_date', 'recipe_id')[
+        settings.FEED_MAX_ITEMS - 1:settings.FEED_MAX_ITEMS
+    ].first()
+    if boundary is None:
+        return 0
+    deleted, _ = FeedItem.objects.filter(user_id=user_id).filter(
+        after(boundary, 'pub_date', 'recipe_id')
+    ).delete()
+    return deleted
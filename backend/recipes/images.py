@@ -0,0 +1,128 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from os.path import splitext
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.dispatch import Signal
+from PIL import Image
+
+from recipes.caches import TTLCache
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = 'renditions'
+
+RENDITIONS = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+
+RENDITION_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+# Копии пишутся в этом порядке, готовность проверяется по последней.
+LAST_RENDITION = (list(RENDITIONS)[-1], list(RENDITION_FORMATS)[-1])
+
+# Имена изображений с готовыми копиями: повторные сериализации не
+# обращаются к хранилищу.
+ready_images = TTLCache(settings.IMAGE_READY_CACHE_SIZE)
+
+# Отправляется, когда копии изображения построены, чтобы сбросить
+# закешированные ответы со ссылками на оригинал.
+renditions_ready = Signal()
+
+# Без воркеров (IMAGE_WORKERS=0) уменьшенные копии строятся прямо в
+# запросе после коммита транзакции.
+executor = (
+    ThreadPoolExecutor(
+        max_workers=settings.IMAGE_WORKERS, thread_name_prefix='renditions'
+    ) if settings.IMAGE_WORKERS else None
+)
+
+
+def rendition_name(name, rendition, extension):
+    return f'{RENDITIONS_DIR}/{rendition}/{splitext(name)[0]}.{extension}'
+
+
+def generate_renditions(name):
+    missing = [
+        (rendition, size, extension, image_format)
+        for rendition, size in RENDITIONS.items()
+        for extension, image_format in RENDITION_FORMATS.items()
+        if not default_storage.exists(
+            rendition_name(name, rendition, extension)
+        )
+    ]
+    if not missing:
+        ready_images.set(name, True, settings.IMAGE_READY_CACHE_TTL)
+        return
+    with default_storage.open(name) as file:
+        original = Image.open(file)
+        original.load()
+    for rendition, size, extension, image_format in missing:
+        image = original.copy()
+        image.thumbnail(size)
+        if image_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        buffer = BytesIO()
+        image.save(
+            buffer, image_format, quality=settings.IMAGE_RENDITION_QUALITY
+        )
+        default_storage.save(
+            rendition_name(name, rendition, extension),
+            ContentFile(buffer.getvalue())
+        )
+    ready_images.set(name, True, settings.IMAGE_READY_CACHE_TTL)
+    renditions_ready.send(sender=None, name=name)
+
+
+def generate_renditions_logged(name):
+    try:
+        generate_renditions(name)
+    except Exception:
+        logger.exception('Не удалось построить копии изображения %s', name)
+
+
+def schedule_renditions(name):
+    if not name:
+        return
+    if executor is None:
+        transaction.on_commit(lambda: generate_renditions_logged(name))
+    else:
+        transaction.on_commit(
+            lambda: executor.submit(generate_renditions_logged, name)
+        )
+
+
+def renditions_are_ready(name):
+    if ready_images.get(name):
+        return True
+    if default_storage.exists(rendition_name(name, *LAST_RENDITION)):
+        ready_images.set(name, True, settings.IMAGE_READY_CACHE_TTL)
+        return True
+    return False
+
+
+def image_renditions(name, request=None):
+    # Пока копии не готовы, вместо них отдается оригинал.
+    ready = renditions_are_ready(name)
+    renditions = {}
+    for rendition in RENDITIONS:
+        renditions[rendition] = {
+            extension: default_storage.url(
+                rendition_name(name, rendition, extension) if ready else name
+            ) for extension in RENDITION_FORMATS
+        }
+        if request is not None:
+            renditions[rendition] = {
+                extension: request.build_absolute_uri(url)
+                for extension, url in renditions[rendition].items()
+            }
+    return renditions
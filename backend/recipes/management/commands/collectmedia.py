@@ -0,0 +1,82 @@
+import os
+from itertools import chain
+from time import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from recipes.images import RENDITIONS_DIR
+from recipes.models import Recipe
+
+User = get_user_model()
+
+MEDIA_DIRS = ('recipes/images', 'users', RENDITIONS_DIR)
+
+
+class Command(BaseCommand):
+    help = 'Удаление файлов медиа, на которые не ссылается ни одна запись'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=float,
+            default=24,
+            help='Не трогать файлы моложе указанного числа часов'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести файлы, ничего не удаляя'
+        )
+
+    @staticmethod
+    def referenced_stems():
+        return {
+            os.path.splitext(name)[0] for name in chain(
+                Recipe.objects.values_list('image', flat=True).iterator(),
+                User.objects.exclude(avatar='').exclude(
+                    avatar__isnull=True
+                ).values_list('avatar', flat=True).iterator()
+            )
+        }
+
+    @staticmethod
+    def media_files():
+        for directory in MEDIA_DIRS:
+            for root, _, files in os.walk(default_storage.path(directory)):
+                for file_name in files:
+                    path = os.path.join(root, file_name)
+                    yield path, os.path.relpath(
+                        path, default_storage.location
+                    ).replace(os.sep, '/')
+
+    @staticmethod
+    def original_stem(name):
+        # renditions/<копия>/<имя оригинала без расширения>.<формат>
+        if name.startswith(f'{RENDITIONS_DIR}/'):
+            name = name.split('/', 2)[-1]
+        return os.path.splitext(name)[0]
+
+    def handle(self, *args, **options):
+        # Ссылки собираются до обхода диска, а свежие файлы пропускаются:
+        # так не удаляются загрузки, запись о которых еще не сохранена.
+        stems = self.referenced_stems()
+        deadline = time() - options['min_age'] * 3600
+        removed = size = 0
+        for path, name in self.media_files():
+            if (
+                self.original_stem(name) in stems
+                or os.path.getmtime(path) > deadline
+            ):
+                continue
+            removed += 1
+            size += os.path.getsize(path)
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                default_storage.delete(name)
+        self.stdout.write(
+            f'{"Найдено" if options["dry_run"] else "Удалено"} '
+            f'{removed} файлов, {size} байт'
+        )
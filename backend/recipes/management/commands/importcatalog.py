@@ -0,0 +1,5 @@
+from .utils import CatalogLoadCommand
+
+
+class Command(CatalogLoadCommand):
+    help = 'Загрузка продуктов или тегов из файла csv, json или jsonl'
@@ -1,23 +1,8 @@
-from csv import reader
+from .utils import CatalogLoadCommand
 
-from django.core.management.base import BaseCommand
 
-from recipes.models import Ingredient
-
-
-class Command(BaseCommand):
-    help = 'Начало загрузки файлов'
-
-    def handle(self, *args, **options):
-        with open(
-            'data/ingredients.csv',
-            'r',
-            encoding='utf-8'
-        ) as ingredient_file:
-            ingredients = Ingredient.objects.bulk_create(
-                (Ingredient(
-                    name=row[0], measurement_unit=row[1]
-                ) for row in reader(ingredient_file)),
-                ignore_conflicts=True
-            )
-            self.stdout.write(f'Загружено {len(ingredients)} продуктов')
+class Command(CatalogLoadCommand):
+    help = 'Загрузка продуктов из data/ingredients.csv'
+    catalog = 'ingredients'
+    file = 'data/ingredients.csv'
+    file_format = 'csv'
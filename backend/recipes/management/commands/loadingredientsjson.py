@@ -1,11 +1,8 @@
-from django.core.management.base import BaseCommand
+from .utils import CatalogLoadCommand
 
-from recipes.models import Ingredient
 
-from .utils import JsonLoadCommand
-
-
-class Command(JsonLoadCommand, BaseCommand):
-    help = 'Начало загрузки файлов'
-    model = Ingredient
+class Command(CatalogLoadCommand):
+    help = 'Загрузка продуктов из data/ingredients.json'
+    catalog = 'ingredients'
     file = 'data/ingredients.json'
+    file_format = 'json'
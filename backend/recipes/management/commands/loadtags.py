@@ -1,16 +1,8 @@
-from csv import reader
+from .utils import CatalogLoadCommand
 
-from django.core.management.base import BaseCommand
 
-from recipes.models import Tag
-
-
-class Command(BaseCommand):
-    help = 'Начало загрузки файлов'
-
-    def handle(self, *args, **options):
-        with open('data/tags.csv', 'r', encoding='utf-8') as tag_file:
-            tags = Tag.objects.bulk_create(
-                (Tag(name=row[0], slug=row[1]) for row in reader(tag_file)),
-                ignore_conflicts=True)
-            self.stdout.write(f'Загружено {len(tags)} тегов')
+class Command(CatalogLoadCommand):
+    help = 'Загрузка тегов из data/tags.csv'
+    catalog = 'tags'
+    file = 'data/tags.csv'
+    file_format = 'csv'
@@ -1,11 +1,8 @@
-from django.core.management.base import BaseCommand
+from .utils import CatalogLoadCommand
 
-from recipes.models import Tag
 
-from .utils import JsonLoadCommand
-
-
-class Command(JsonLoadCommand, BaseCommand):
-    help = 'Начало загрузки файлов'
-    model = Tag
+class Command(CatalogLoadCommand):
+    help = 'Загрузка тегов из data/tags.json'
+    catalog = 'tags'
     file = 'data/tags.json'
+    file_format = 'json'
@@ -0,0 +1,25 @@
+from itertools import chain
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_renditions_logged
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Построение уменьшенных копий изображений рецептов и аватаров'
+
+    def handle(self, *args, **options):
+        count = 0
+        for name in chain(
+            Recipe.objects.values_list('image', flat=True).iterator(),
+            User.objects.exclude(avatar='').exclude(
+                avatar__isnull=True
+            ).values_list('avatar', flat=True).iterator()
+        ):
+            generate_renditions_logged(name)
+            count += 1
+        self.stdout.write(f'Обработано {count} изображений')
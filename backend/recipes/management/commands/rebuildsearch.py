@@ -0,0 +1,29 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import Recipe, RecipeSearch
+
+
+class Command(BaseCommand):
+    help = 'Пересборка поисковых документов рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько рецептов обрабатывать в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        recipe_ids = Recipe.objects.values_list(
+            'id', flat=True
+        ).order_by('id').iterator()
+        count = 0
+        while batch := list(islice(recipe_ids, options['batch_size'])):
+            with transaction.atomic():
+                RecipeSearch.objects.update_documents(batch)
+            count += len(batch)
+        self.stdout.write(f'Обновлено {count} документов')
@@ -0,0 +1,93 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import ShopingCart, ShopingCartIngredient
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчет агрегированного списка покупок по корзинам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сверить агрегат с корзинами, ничего не изменяя'
+        )
+
+    @staticmethod
+    def expected_amounts(users=None):
+        carts = ShopingCart.objects.filter(
+            recipe__recipe_ingredients__isnull=False
+        )
+        if users is not None:
+            carts = carts.filter(user__in=users)
+        return carts.values_list(
+            'user', 'recipe__recipe_ingredients__ingredient'
+        ).annotate(
+            amount=Sum('recipe__recipe_ingredients__amount')
+        ).order_by(
+            'user', 'recipe__recipe_ingredients__ingredient'
+        ).iterator()
+
+    @staticmethod
+    def stored_amounts():
+        return ShopingCartIngredient.objects.values_list(
+            'user', 'ingredient', 'amount'
+        ).order_by('user', 'ingredient').iterator()
+
+    def mismatched_users(self):
+        # Обе выборки отсортированы по (user, ingredient), поэтому
+        # сверка идет слиянием без загрузки таблиц в память.
+        expected, stored = self.expected_amounts(), self.stored_amounts()
+        left, right = next(expected, None), next(stored, None)
+        mismatches, users = 0, set()
+        while left is not None or right is not None:
+            if right is None or (left is not None and left[:2] < right[:2]):
+                mismatches += 1
+                users.add(left[0])
+                left = next(expected, None)
+            elif left is None or right[:2] < left[:2]:
+                mismatches += 1
+                users.add(right[0])
+                right = next(stored, None)
+            else:
+                if left[2] != right[2]:
+                    mismatches += 1
+                    users.add(left[0])
+                left, right = next(expected, None), next(stored, None)
+        return mismatches, sorted(users)
+
+    def rebuild(self, user):
+        # Пересчитываются только пользователи с расхождениями, каждый в
+        # своей транзакции. Строки, вставленные параллельно из API, не
+        # роняют пересчет; если они разошлись, их поправит следующий
+        # запуск.
+        with transaction.atomic():
+            ShopingCartIngredient.objects.filter(user=user).delete()
+            items = (
+                ShopingCartIngredient(
+                    user_id=user, ingredient_id=ingredient, amount=amount
+                ) for _, ingredient, amount in self.expected_amounts((user,))
+            )
+            created = 0
+            while batch := list(islice(items, BATCH_SIZE)):
+                ShopingCartIngredient.objects.bulk_create(
+                    batch, ignore_conflicts=True
+                )
+                created += len(batch)
+        return created
+
+    def handle(self, *args, **options):
+        mismatches, users = self.mismatched_users()
+        self.stdout.write(f'Расхождений с корзинами: {mismatches}')
+        if options['check'] or not mismatches:
+            return
+        created = sum(self.rebuild(user) for user in users)
+        self.stdout.write(
+            f'Пересчитано {created} позиций у {len(users)} пользователей'
+        )
@@ -0,0 +1,55 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShopingCart
+
+BATCH_SIZE = 1000
+
+
+def actual_count(model):
+    return Coalesce(Subquery(
+        model.objects.filter(recipe=OuterRef('pk')).order_by().values(
+            'recipe'
+        ).annotate(count=Count('*')).values('count'),
+        output_field=IntegerField()
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Сверка счетчиков избранного и списков покупок у рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только посчитать расхождения, ничего не изменяя'
+        )
+
+    def handle(self, *args, **options):
+        counters = {
+            model.counter_field: model for model in (Favorite, ShopingCart)
+        }
+        recipes = Recipe.objects.annotate(**{
+            f'actual_{counter}': actual_count(model)
+            for counter, model in counters.items()
+        }).values_list(
+            'id', *counters, *(f'actual_{counter}' for counter in counters)
+        ).order_by('id').iterator()
+        mismatches = 0
+        while batch := list(islice(recipes, BATCH_SIZE)):
+            changed = [
+                recipe_id for recipe_id, *counts in batch
+                if counts[:len(counters)] != counts[len(counters):]
+            ]
+            mismatches += len(changed)
+            if changed and not options['check']:
+                # Значения считаются заново в самом UPDATE, поэтому
+                # одновременные изменения избранного не затираются.
+                Recipe.objects.filter(id__in=changed).update(**{
+                    counter: actual_count(model)
+                    for counter, model in counters.items()
+                })
+        self.stdout.write(f'Рецептов с расхождениями: {mismatches}')
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from recipes.feed import follow, trim_feed
+from recipes.models import FeedItem, Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрезка лент подписок до FEED_MAX_ITEMS последних рецептов '
+        'на пользователя'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Сначала заполнить ленты по существующим подпискам'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            for follower_id, author_id in Subscription.objects.values_list(
+                'follower', 'author'
+            ).order_by('id').iterator():
+                follow(follower_id, author_id)
+        deleted = sum(
+            trim_feed(user_id) for user_id in FeedItem.objects.values(
+                'user'
+            ).annotate(items=Count('id')).filter(
+                items__gt=settings.FEED_MAX_ITEMS
+            ).values_list('user', flat=True).order_by().iterator()
+        )
+        self.stdout.write(f'Удалено записей лент: {deleted}')
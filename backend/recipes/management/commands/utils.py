@@ -1,11 +1,202 @@
+import csv
 import json
+import os
+import re
+from itertools import islice
+from time import monotonic
 
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
 
-class JsonLoadCommand:
+from recipes.models import Ingredient, Tag
 
-    def handle(self):
-        with open(self.file, 'r', encoding='utf-8') as file:
-            items_created = self.model.objects.bulk_create(
-                (self.model(**tag) for tag in json.load(file)),
-                ignore_conflicts=True)
-            self.stdout.write(f'Загружено {len(items_created)} тегов')
+# Каталог: модель, поля строки в порядке столбцов csv и поля, по которым
+# запись считается уже загруженной (уникальное ограничение модели).
+CATALOGS = {
+    'ingredients': (
+        Ingredient, ('name', 'measurement_unit'), ('name', 'measurement_unit')
+    ),
+    'tags': (Tag, ('name', 'slug'), ('slug',)),
+}
+
+JSON_CHUNK_SIZE = 64 * 1024
+
+JSON_SEPARATOR = re.compile(r'\s*,?\s*')
+
+
+def read_csv(file, fields):
+    for row in csv.reader(file):
+        yield dict(zip(fields, row)) if len(row) == len(fields) else None
+
+
+def read_jsonl(file, fields):
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def read_json(file, fields):
+    # Массив объектов разбирается по одному элементу: в памяти держится
+    # только непрочитанный остаток очередного куска файла.
+    decoder = json.JSONDecoder()
+    buffer = file.read(JSON_CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив объектов.')
+    position = 1
+    while True:
+        position = JSON_SEPARATOR.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except ValueError:
+            chunk = file.read(JSON_CHUNK_SIZE)
+            if not chunk:
+                raise CommandError('Файл JSON поврежден или оборван.')
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'jsonl': read_jsonl,
+}
+
+
+def clean_row(model, fields, item):
+    if not isinstance(item, dict):
+        return None
+    row = {}
+    for field in fields:
+        value = item.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        value = value.strip()
+        if len(value) > model._meta.get_field(field).max_length:
+            return None
+        row[field] = value
+    return row
+
+
+def stored_rows(model, key_fields, keys, *fields):
+    # Отбор идет по первому полю ключа, остальные сверяются в Python.
+    return {
+        row[:len(key_fields)]: row[len(key_fields):]
+        for row in model.objects.filter(**{
+            f'{key_fields[0]}__in': {key[0] for key in keys}
+        }).values_list(*key_fields, *fields)
+        if row[:len(key_fields)] in keys
+    }
+
+
+def load_batch(model, fields, key_fields, batch):
+    rows = {}
+    skipped = 0
+    for item in batch:
+        row = clean_row(model, fields, item)
+        key = row and tuple(row[field] for field in key_fields)
+        if row is None or key in rows:
+            skipped += 1
+        else:
+            rows[key] = row
+    update_fields = [field for field in fields if field not in key_fields]
+    with transaction.atomic():
+        existing = stored_rows(model, key_fields, rows, 'pk', *update_fields)
+        changed = [
+            model(pk=pk, **rows[key])
+            for key, (pk, *values) in existing.items()
+            if values != [rows[key][field] for field in update_fields]
+        ]
+        new = {key for key in rows if key not in existing}
+        # Конфликты по другим уникальным полям и одновременная загрузка
+        # пропускаются базой, поэтому добавленные строки пересчитываются.
+        model.objects.bulk_create(
+            (model(**rows[key]) for key in new), ignore_conflicts=True
+        )
+        if changed:
+            model.objects.bulk_update(changed, update_fields)
+        inserted = len(stored_rows(model, key_fields, new)) if new else 0
+    return {
+        'inserted': inserted,
+        'updated': len(changed),
+        'skipped': skipped + len(rows) - inserted - len(changed),
+    }
+
+
+class CatalogLoadCommand(BaseCommand):
+    help = 'Потоковая загрузка каталога из файла csv, json или jsonl'
+    catalog = None
+    file = None
+    file_format = None
+
+    def add_arguments(self, parser):
+        if self.catalog is None:
+            parser.add_argument('catalog', choices=CATALOGS)
+        parser.add_argument(
+            'path',
+            nargs='?' if self.file else None,
+            default=self.file,
+            help='Путь к файлу'
+        )
+        parser.add_argument(
+            '--format',
+            choices=READERS,
+            default=self.file_format,
+            help='Формат файла, по умолчанию определяется по расширению'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Число строк в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        model, fields, key_fields = CATALOGS[
+            self.catalog or options['catalog']
+        ]
+        path = options['path']
+        file_format = (
+            options['format'] or os.path.splitext(path)[1][1:].lower()
+        )
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла {path}.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        totals = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        processed = 0
+        started = monotonic()
+        try:
+            file = open(path, 'r', encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть файл: {error}')
+        with file:
+            items = READERS[file_format](file, fields)
+            while batch := list(islice(items, options['batch_size'])):
+                try:
+                    counts = load_batch(model, fields, key_fields, batch)
+                except IntegrityError as error:
+                    raise CommandError(
+                        f'Строки {processed + 1}-{processed + len(batch)} '
+                        f'не загружены: {error}'
+                    )
+                for name, count in counts.items():
+                    totals[name] += count
+                processed += len(batch)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Обработано {processed} строк')
+        elapsed = monotonic() - started
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: '
+            f'добавлено {totals["inserted"]}, '
+            f'обновлено {totals["updated"]}, '
+            f'пропущено {totals["skipped"]}; '
+            f'{processed} строк за {elapsed:.1f} с '
+            f'({processed / elapsed if elapsed else 0:.0f} строк/с)'
+        )
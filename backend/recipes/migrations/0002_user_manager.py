@@ -0,0 +1,42 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:00
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import recipes.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='foodgramuser',
+            managers=[
+                ('objects', recipes.models.FoodgramUserManager()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='foodgramuser',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to='users/', verbose_name='Аватар пользователя'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='amount',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Мера'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='ingredient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='recipes.ingredient', verbose_name='Продукт'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+
+def fill_shopingcart_ingredients(apps, schema_editor):
+    ShopingCart = apps.get_model('recipes', 'ShopingCart')
+    ShopingCartIngredient = apps.get_model('recipes', 'ShopingCartIngredient')
+    ShopingCartIngredient.objects.bulk_create((
+        ShopingCartIngredient(
+            user_id=item['user'],
+            ingredient_id=item['recipe__recipe_ingredients__ingredient'],
+            amount=item['amount']
+        ) for item in ShopingCart.objects.filter(
+            recipe__recipe_ingredients__isnull=False
+        ).values(
+            'user', 'recipe__recipe_ingredients__ingredient'
+        ).annotate(
+            amount=Sum('recipe__recipe_ingredients__amount')
+        ).order_by().iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_user_manager'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopingCartIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(default=0, verbose_name='Мера')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopingcart_ingredients', to='recipes.ingredient', verbose_name='Продукт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopingcart_ingredients', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Продукт из списка покупок',
+                'verbose_name_plural': 'Продукты из списка покупок',
+                'default_related_name': 'shopingcart_ingredients',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shopingcartingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopingcart_ingredients'),
+        ),
+        migrations.RunPython(
+            fill_shopingcart_ingredients, migrations.RunPython.noop
+        ),
+    ]
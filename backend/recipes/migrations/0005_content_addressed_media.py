@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:14
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='foodgramuser',
+            name='avatar',
+            field=models.ImageField(blank=True, db_index=True, null=True, storage=recipes.storage.ContentAddressedStorage(), upload_to='users/', verbose_name='Аватар пользователя'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(db_index=True, storage=recipes.storage.ContentAddressedStorage(), upload_to='recipes/images/', verbose_name='Изображение'),
+        ),
+    ]
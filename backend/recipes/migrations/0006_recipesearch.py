@@ -0,0 +1,108 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:27
+
+from collections import defaultdict
+from itertools import islice
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SEARCH_INDEX_SQL = {
+    'postgresql': (
+        (
+            'ALTER TABLE recipes_recipesearch ADD COLUMN vector tsvector '
+            'GENERATED ALWAYS AS ('
+            "setweight(to_tsvector('russian'::regconfig, name), 'A') || "
+            "setweight(to_tsvector('russian'::regconfig, ingredients), 'B') || "
+            "setweight(to_tsvector('russian'::regconfig, text), 'C')"
+            ') STORED',
+            'CREATE INDEX recipes_recipesearch_vector_idx '
+            'ON recipes_recipesearch USING gin (vector)',
+        ),
+        (
+            'ALTER TABLE recipes_recipesearch DROP COLUMN vector',
+        ),
+    ),
+    'sqlite': (
+        (
+            'CREATE VIRTUAL TABLE recipes_recipesearch_fts '
+            'USING fts5(name, ingredients, text)',
+            'CREATE TRIGGER recipes_recipesearch_insert '
+            'AFTER INSERT ON recipes_recipesearch BEGIN '
+            'INSERT INTO recipes_recipesearch_fts(rowid, name, ingredients, text) '
+            'VALUES (new.recipe_id, new.name, new.ingredients, new.text); END',
+            'CREATE TRIGGER recipes_recipesearch_delete '
+            'AFTER DELETE ON recipes_recipesearch BEGIN '
+            'DELETE FROM recipes_recipesearch_fts WHERE rowid = old.recipe_id; END',
+            'CREATE TRIGGER recipes_recipesearch_update '
+            'AFTER UPDATE ON recipes_recipesearch BEGIN '
+            'DELETE FROM recipes_recipesearch_fts WHERE rowid = old.recipe_id; '
+            'INSERT INTO recipes_recipesearch_fts(rowid, name, ingredients, text) '
+            'VALUES (new.recipe_id, new.name, new.ingredients, new.text); END',
+        ),
+        (
+            'DROP TRIGGER recipes_recipesearch_update',
+            'DROP TRIGGER recipes_recipesearch_delete',
+            'DROP TRIGGER recipes_recipesearch_insert',
+            'DROP TABLE recipes_recipesearch_fts',
+        ),
+    ),
+}
+
+
+def run_search_index_sql(position):
+    def run(apps, schema_editor):
+        for statement in SEARCH_INDEX_SQL[
+            schema_editor.connection.vendor
+        ][position]:
+            schema_editor.execute(statement)
+    return run
+
+
+def fill_recipe_search(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    RecipeSearch = apps.get_model('recipes', 'RecipeSearch')
+    recipes = Recipe.objects.values_list(
+        'id', 'name', 'text'
+    ).order_by('id').iterator()
+    while batch := list(islice(recipes, 1000)):
+        ingredients = defaultdict(list)
+        for recipe_id, name in RecipeIngredient.objects.filter(
+            recipe_id__in=[recipe_id for recipe_id, _, _ in batch]
+        ).values_list('recipe_id', 'ingredient__name').order_by('id'):
+            ingredients[recipe_id].append(name)
+        RecipeSearch.objects.bulk_create(
+            RecipeSearch(
+                recipe_id=recipe_id,
+                name=name,
+                ingredients=' '.join(ingredients[recipe_id]),
+                text=text
+            ) for recipe_id, name, text in batch
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSearch',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('name', models.TextField(verbose_name='Название')),
+                ('ingredients', models.TextField(verbose_name='Продукты')),
+                ('text', models.TextField(verbose_name='Описание')),
+            ],
+            options={
+                'verbose_name': 'Поисковый документ рецепта',
+                'verbose_name_plural': 'Поисковые документы рецептов',
+            },
+        ),
+        migrations.RunPython(
+            run_search_index_sql(0), run_search_index_sql(1)
+        ),
+        migrations.RunPython(fill_recipe_search, migrations.RunPython.noop),
+    ]
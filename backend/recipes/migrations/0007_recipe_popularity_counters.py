@@ -0,0 +1,49 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:36
+
+from itertools import islice
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_popularity_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for model_name, counter in (
+        ('Favorite', 'favorites_count'), ('ShopingCart', 'in_carts_count')
+    ):
+        counts = apps.get_model('recipes', model_name).objects.values_list(
+            'recipe'
+        ).annotate(count=Count('id')).order_by().iterator()
+        while batch := list(islice(counts, 1000)):
+            Recipe.objects.bulk_update(
+                [Recipe(id=recipe_id, **{counter: count})
+                 for recipe_id, count in batch],
+                (counter,)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipesearch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(
+            fill_popularity_counters, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-favorites_count', '-pub_date', '-id'], name='recipe_popular_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from functools import lru_cache
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def fill_feed_items(apps, schema_editor):
+    # Ленты существующих подписчиков: последние FEED_MAX_ITEMS рецептов
+    # их авторов, кроме популярных, которые подмешиваются при чтении.
+    FeedItem = apps.get_model('recipes', 'FeedItem')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Subscription = apps.get_model('recipes', 'Subscription')
+    popular_ids = set(Subscription.objects.values('author').annotate(
+        followers=Count('id')
+    ).filter(
+        followers__gt=settings.FEED_FANOUT_LIMIT
+    ).values_list('author', flat=True))
+
+    @lru_cache(maxsize=1000)
+    def author_recipes(author_id):
+        return list(Recipe.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id'
+        ).values_list('pub_date', 'id')[:settings.FEED_MAX_ITEMS])
+
+    subscriptions = Subscription.objects.exclude(
+        author_id__in=popular_ids
+    ).values_list('follower', 'author').order_by('follower').iterator()
+    items = (
+        FeedItem(user_id=follower_id, recipe_id=recipe_id, pub_date=pub_date)
+        for follower_id, follows in groupby(
+            subscriptions, key=lambda subscription: subscription[0]
+        )
+        for pub_date, recipe_id in sorted(
+            (
+                key for _, author_id in follows
+                for key in author_recipes(author_id)
+            ),
+            reverse=True
+        )[:settings.FEED_MAX_ITEMS]
+    )
+    while batch := list(islice(items, 1000)):
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_feeditem'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_feed_items, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,49 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import MinValueValidator, RegexValidator
-from django.db import models
+from django.db import connections, models
+from django.db.models import (BooleanField, Case, Count, Exists, F,
+                              IntegerField, OuterRef, Prefetch, Subquery,
+                              Value, When)
+from django.db.models.functions import Greatest
 
 from .constants import (
     MAX_LENGHT, MAX_USER_LENGHT, MAX_LENGHT_EMAIL, MINIMAL_AMOUNT, MINIMAL_TIME
 )
+from .search import SEARCH_SQL
+from .storage import content_addressed_storage
+
+
+class FoodgramUserQuerySet(models.QuerySet):
+
+    def with_is_subscribed(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_subscribed=Value(False, output_field=BooleanField())
+            )
+        return self.annotate(is_subscribed=Exists(
+            Subscription.objects.filter(
+                follower=user, author=OuterRef('pk')
+            )
+        ))
+
+    def with_recipes(self, recipes_limit=None):
+        recipes = Recipe.objects.all()
+        if recipes_limit is not None:
+            recipes = recipes.filter(id__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('id')[:recipes_limit]
+            ))
+        return self.annotate(recipes_count=Count('recipes')).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        )
+
+
+class FoodgramUserManager(UserManager.from_queryset(FoodgramUserQuerySet)):
+    pass
 
 
 class FoodgramUser(AbstractUser):
@@ -15,7 +53,8 @@ class FoodgramUser(AbstractUser):
     )
     avatar = models.ImageField(
         upload_to='users/', null=True,
-        blank=True, verbose_name='Аватар пользователя'
+        blank=True, verbose_name='Аватар пользователя',
+        storage=content_addressed_storage, db_index=True
     )
     username = models.CharField(
         verbose_name='Логин', max_length=MAX_USER_LENGHT, unique=True,
@@ -32,6 +71,8 @@ class FoodgramUser(AbstractUser):
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
     USERNAME_FIELD = 'email'
 
+    objects = FoodgramUserManager()
+
     class Meta:
         ordering = ('username',)
         verbose_name = 'Пользователь'
@@ -84,6 +125,57 @@ class Tag(models.Model):
         return self.name
 
 
+COUNTER_FIELDS = ('favorites_count', 'in_carts_count')
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField())
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShopingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+        )
+
+    def search(self, query):
+        prepare, table, join, match, rank = SEARCH_SQL[
+            connections[self.db].vendor
+        ]
+        query = prepare(query)
+        if not query:
+            return self.none()
+        # Индекс присоединяется к рецептам, а не проверяется подзапросом
+        # для каждой строки: ранг считается в том же проходе по индексу.
+        return self.extra(
+            tables=(table,),
+            where=(join, match),
+            params=(query,),
+            select={'search_rank': rank},
+            select_params=(query,)
+        ).order_by('-search_rank', '-pub_date', '-id')
+
+    def with_related(self, user):
+        return self.with_user_flags(user).prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.with_is_subscribed(user)
+            ),
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -101,7 +193,9 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/images/',
-        verbose_name='Изображение'
+        verbose_name='Изображение',
+        storage=content_addressed_storage,
+        db_index=True
     )
     name = models.CharField(max_length=MAX_LENGHT, verbose_name='Название')
     text = models.TextField('Описание')
@@ -116,16 +210,46 @@ class Recipe(models.Model):
         default=MINIMAL_TIME,
         verbose_name='Время (мин)'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В списках покупок'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'recipes'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_popular_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Счетчики меняются только через F-выражения, поэтому сохранение
+        # рецепта не должно перезаписывать их устаревшими значениями.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
@@ -154,6 +278,52 @@ class RecipeIngredient(models.Model):
         return f'{self.ingredient.name}, {self.ingredient.measurement_unit}'
 
 
+class RecipeSearchQuerySet(models.QuerySet):
+
+    def update_documents(self, recipe_ids):
+        # Документ пересобирается целиком: поисковый индекс обновляет
+        # сама база (вычисляемый столбец в PostgreSQL, триггеры в SQLite).
+        recipe_ids = list(recipe_ids)
+        ingredients = defaultdict(list)
+        for recipe_id, name in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient__name').order_by('id'):
+            ingredients[recipe_id].append(name)
+        self.filter(recipe_id__in=recipe_ids).delete()
+        self.bulk_create(
+            self.model(
+                recipe_id=recipe_id,
+                name=name,
+                ingredients=' '.join(ingredients[recipe_id]),
+                text=text
+            ) for recipe_id, name, text in Recipe.objects.filter(
+                id__in=recipe_ids
+            ).values_list('id', 'name', 'text').order_by()
+        )
+
+
+class RecipeSearch(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        verbose_name='Рецепт'
+    )
+    name = models.TextField(verbose_name='Название')
+    ingredients = models.TextField(verbose_name='Продукты')
+    text = models.TextField(verbose_name='Описание')
+
+    objects = RecipeSearchQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Поисковый документ рецепта'
+        verbose_name_plural = 'Поисковые документы рецептов'
+
+    def __str__(self):
+        return self.name
+
+
 class UserRecipeRelation(models.Model):
     user = models.ForeignKey(
         User,
@@ -182,6 +352,7 @@ class UserRecipeRelation(models.Model):
 
 
 class Favorite(UserRecipeRelation):
+    counter_field = 'favorites_count'
 
     class Meta(UserRecipeRelation.Meta):
         verbose_name = 'Избранное'
@@ -189,12 +360,78 @@ class Favorite(UserRecipeRelation):
 
 
 class ShopingCart(UserRecipeRelation):
+    counter_field = 'in_carts_count'
 
     class Meta(UserRecipeRelation.Meta):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Список покупок'
 
 
+class ShopingCartIngredientQuerySet(models.QuerySet):
+
+    def change_amounts(self, users, amounts):
+        # amounts: продукт -> на сколько изменить меру у каждого из users.
+        amounts = {
+            ingredient: amount for ingredient, amount in amounts.items()
+            if amount
+        }
+        if not users or not amounts:
+            return
+        self.bulk_create((
+            self.model(user_id=user, ingredient_id=ingredient)
+            for user in users for ingredient, amount in amounts.items()
+            if amount > 0
+        ), ignore_conflicts=True)
+        items = self.filter(user_id__in=users, ingredient_id__in=amounts)
+        items.update(amount=Greatest(F('amount') + Case(*(
+            When(ingredient_id=ingredient, then=Value(amount))
+            for ingredient, amount in amounts.items()
+        ), output_field=IntegerField()), 0))
+        items.filter(amount__lte=0).delete()
+
+    def change_recipe_amounts(self, users, recipe, sign):
+        self.change_amounts(users, {
+            ingredient: sign * amount
+            for ingredient, amount in RecipeIngredient.objects.filter(
+                recipe=recipe
+            ).values_list('ingredient_id', 'amount')
+        })
+
+    def add_recipe(self, users, recipe):
+        self.change_recipe_amounts(users, recipe, 1)
+
+    def remove_recipe(self, users, recipe):
+        self.change_recipe_amounts(users, recipe, -1)
+
+
+class ShopingCartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Продукт'
+    )
+    amount = models.IntegerField(default=0, verbose_name='Мера')
+
+    objects = ShopingCartIngredientQuerySet.as_manager()
+
+    class Meta:
+        default_related_name = 'shopingcart_ingredients'
+        constraints = (models.UniqueConstraint(
+            fields=('user', 'ingredient'),
+            name='unique_shopingcart_ingredients'
+        ),)
+        verbose_name = 'Продукт из списка покупок'
+        verbose_name_plural = 'Продукты из списка покупок'
+
+    def __str__(self):
+        return f'{self.user.username}: {self.ingredient} {self.amount}'
+
+
 class Subscription(models.Model):
     follower = models.ForeignKey(
         User,
@@ -221,3 +458,35 @@ class Subscription(models.Model):
 
     def __str__(self):
         return f'{self.follower} подписан на {self.author}'
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        default_related_name = 'feed_items'
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_item'
+            ),
+        )
+        indexes = (models.Index(
+            fields=('user', '-pub_date', '-recipe'),
+            name='feed_item_user_pub_date_idx'
+        ),)
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
@@ -0,0 +1,39 @@
+import re
+
+# Поисковые документы рецептов лежат в таблице recipes_recipesearch.
+# В PostgreSQL по ней построен tsvector с GIN-индексом, в SQLite (режим
+# DEBUG) - таблица FTS5, которую заполняют триггеры. Ранг тем выше, чем
+# релевантнее рецепт: совпадение в названии весит больше, чем в
+# продуктах, а в продуктах - больше, чем в описании.
+
+WORD = re.compile(r'\w+')
+
+
+def fts5_query(query):
+    # Слова экранируются и ищутся по префиксу, все должны встретиться.
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query))
+
+
+def tsquery(query):
+    # Слова ищутся по префиксу, как в SQLite, все должны встретиться.
+    return ' & '.join(f'{word}:*' for word in WORD.findall(query))
+
+
+# Для каждой базы: подготовка запроса, таблица с индексом, условие
+# связи с рецептом, условие совпадения и выражение ранга.
+SEARCH_SQL = {
+    'postgresql': (
+        tsquery,
+        'recipes_recipesearch',
+        'recipes_recipesearch.recipe_id = recipes_recipe.id',
+        "recipes_recipesearch.vector @@ to_tsquery('russian', %s)",
+        "ts_rank(recipes_recipesearch.vector, to_tsquery('russian', %s))",
+    ),
+    'sqlite': (
+        fts5_query,
+        'recipes_recipesearch_fts',
+        'recipes_recipesearch_fts.rowid = recipes_recipe.id',
+        'recipes_recipesearch_fts MATCH %s',
+        '-bm25(recipes_recipesearch_fts, 10.0, 5.0, 1.0)',
+    ),
+}
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from recipes.feed import follow, schedule_fan_out, unfollow
+from recipes.images import schedule_renditions
+from recipes.models import (FeedItem, Ingredient, Recipe, RecipeIngredient,
+                            RecipeSearch, ShopingCart, ShopingCartIngredient,
+                            Subscription)
+from recipes.views import recipe_ids
+
+User = get_user_model()
+
+SEARCH_BATCH_SIZE = 1000
+
+IMAGE_FIELDS = {Recipe: 'image', User: 'avatar'}
+
+
+def file_name(instance, field):
+    # Значение читается мимо дескриптора: строка из базы, файл,
+    # присвоенный или сохраненный полем, либо DEFERRED для отложенного
+    # поля.
+    value = instance.__dict__.get(field, DEFERRED)
+    return getattr(value, 'name', value)
+
+
+@receiver(post_init, sender=Recipe)
+@receiver(post_init, sender=User)
+def remember_image_name(sender, instance, **kwargs):
+    instance.stored_image_name = file_name(instance, IMAGE_FIELDS[sender])
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def image_renditions(sender, instance, created, **kwargs):
+    # Recipe.save передает в update_fields все поля, поэтому смена
+    # изображения определяется по имени, загруженному из базы.
+    name = file_name(instance, IMAGE_FIELDS[sender])
+    stored = instance.stored_image_name
+    if created or stored is not DEFERRED and name != stored:
+        schedule_renditions(name)
+    instance.stored_image_name = name
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def short_link_invalidate(instance, **kwargs):
+    recipe_ids.delete(instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_feed(instance, created, **kwargs):
+    # pub_date обновляется при каждом сохранении рецепта, записи лент
+    # сдвигаются вместе с ним, чтобы порядок совпадал со списком рецептов.
+    if created:
+        schedule_fan_out(instance.id)
+    else:
+        FeedItem.objects.filter(recipe=instance).update(
+            pub_date=instance.pub_date
+        )
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_feed(instance, created, **kwargs):
+    if created:
+        follow(instance.follower_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_feed_delete(instance, **kwargs):
+    unfollow(instance.follower_id, instance.author_id)
+
+
+def change_cart_amounts(recipe_ingredient, sign):
+    ShopingCartIngredient.objects.change_amounts(
+        list(ShopingCart.objects.filter(
+            recipe_id=recipe_ingredient.recipe_id
+        ).values_list('user_id', flat=True)),
+        {recipe_ingredient.ingredient_id: sign * recipe_ingredient.amount}
+    )
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def recipe_ingredient_cart_replace(instance, **kwargs):
+    # Сохраненная строка вычитается из корзин в прежнем виде, новая
+    # добавляется после сохранения: так правки в админке (инлайн
+    # продуктов рецепта) не расходятся с агрегатом корзин.
+    if instance.pk is None:
+        return
+    stored = RecipeIngredient.objects.filter(pk=instance.pk).first()
+    if stored is not None:
+        change_cart_amounts(stored, -1)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def recipe_ingredient_cart_add(instance, **kwargs):
+    change_cart_amounts(instance, 1)
+
+
+@receiver(pre_delete, sender=RecipeIngredient)
+def recipe_ingredient_cart_remove(instance, **kwargs):
+    # Каскад отправляет pre_delete всем строкам до удаления корзин,
+    # поэтому удаление рецепта или его автора вычитается здесь же.
+    change_cart_amounts(instance, -1)
+
+
+def update_search_documents(recipe_ids):
+    for start in range(0, len(recipe_ids), SEARCH_BATCH_SIZE):
+        RecipeSearch.objects.update_documents(
+            recipe_ids[start:start + SEARCH_BATCH_SIZE]
+        )
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_search_documents(
+    instance, created=False, update_fields=None, **kwargs
+):
+    # Название продукта входит в поисковые документы рецептов с ним.
+    # Рецепты выбираются до удаления продукта вместе с их строками,
+    # документы пересобираются после коммита.
+    if created or update_fields is not None and 'name' not in update_fields:
+        return
+    recipe_ids = list(RecipeIngredient.objects.filter(
+        ingredient=instance
+    ).values_list('recipe_id', flat=True).distinct().order_by())
+    transaction.on_commit(lambda: update_search_documents(recipe_ids))
@@ -0,0 +1,40 @@
+import os
+from hashlib import sha256
+from uuid import uuid4
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    # Файл называется по хешу содержимого внутри каталога upload_to,
+    # поэтому повторная загрузка тех же данных ничего не пишет на диск.
+
+    def _save(self, name, content):
+        digest = sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, file_name = os.path.split(name)
+        name = os.path.join(
+            directory,
+            digest[:2],
+            digest + os.path.splitext(file_name)[1].lower()
+        )
+        try:
+            # Обновленное время изменения защищает файл от collectmedia,
+            # пока запись со ссылкой на него еще не сохранена.
+            os.utime(self.path(name))
+            return name
+        except FileNotFoundError:
+            pass
+        # Запись идет во временный файл и атомарно переименовывается:
+        # одновременная загрузка одинаковых данных не приведет к ошибке.
+        temporary_name = super()._save(
+            os.path.join(directory, digest[:2], f'.{uuid4().hex}.tmp'),
+            content
+        )
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
+
+
+content_addressed_storage = ContentAddressedStorage()
@@ -0,0 +1,103 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from recipes.dump import TABLES, table_fields
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShopingCart, Subscription, Tag)
+
+User = get_user_model()
+
+
+class DumpRecipesTest(TransactionTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        # Файлов изображений нет, уменьшенные копии не строятся.
+        patcher = mock.patch('recipes.signals.schedule_renditions')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        users = [
+            User.objects.create_user(
+                email=f'user{number}@foodgram.ru',
+                username=f'user{number}',
+                password='Foodgram-test-1',
+                first_name='Имя',
+                last_name='Фамилия, "в кавычках"'
+            ) for number in range(3)
+        ]
+        tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}')
+            for number in range(2)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'продукт {number}', measurement_unit='г'
+            ) for number in range(3)
+        ]
+        for number in range(4):
+            recipe = Recipe.objects.create(
+                author=users[number % 3],
+                name=f'Рецепт {number}',
+                text='Строка\nс переносом',
+                image='recipes/images/recipe.png',
+                cooking_time=5 + number
+            )
+            recipe.tags.set(tags[:number % 2 + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                ) for ingredient in ingredients[:number % 3 + 1]
+            )
+            Favorite.objects.create(user=users[0], recipe=recipe)
+            ShopingCart.objects.create(user=users[1], recipe=recipe)
+        Subscription.objects.create(follower=users[0], author=users[1])
+
+    def snapshot(self):
+        return {
+            table: list(TABLES[table][0].objects.values_list(
+                *(field.attname for field in table_fields(table))
+            ).order_by('pk'))
+            for table in TABLES
+        }
+
+    def dump(self, directory, *args):
+        call_command(
+            'dumprecipes', directory, *args, stdout=StringIO()
+        )
+        files = {}
+        for name in sorted(os.listdir(directory)):
+            # Заголовок gzip содержит время сжатия.
+            with (gzip.open if name.endswith('.gz') else open)(
+                os.path.join(directory, name), 'rb'
+            ) as file:
+                files[name] = file.read()
+        return files
+
+    def round_trip(self, *args):
+        before = self.snapshot()
+        first = self.dump(self.directory, *args)
+        for table in reversed(TABLES):
+            TABLES[table][0].objects.all().delete()
+        call_command('loadrecipes', self.directory, stdout=StringIO())
+        self.assertEqual(self.snapshot(), before)
+        second = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, second)
+        self.assertEqual(self.dump(second, *args), first)
+        self.assertFalse(
+            User.objects.filter(username='user0').get().has_usable_password()
+        )
+
+    def test_jsonl_round_trip(self):
+        self.round_trip()
+
+    def test_csv_gzip_round_trip(self):
+        self.round_trip('--format', 'csv', '--gzip', '--workers', '2')
@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from recipes.models import Ingredient, Tag
+
+
+class ImportCatalogTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def import_catalog(self, *args):
+        output = StringIO()
+        call_command('importcatalog', *args, stdout=output)
+        return output.getvalue()
+
+    def test_counts_for_csv(self):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        path = self.write('ingredients.csv', (
+            'соль,г\n'
+            'сахар,г\n'
+            'сахар,г\n'
+            'молоко\n'
+            ',мл\n'
+            'молоко,мл\n'
+        ))
+        output = self.import_catalog('ingredients', path)
+        self.assertIn('добавлено 2, обновлено 0, пропущено 4', output)
+        self.assertEqual(Ingredient.objects.count(), 3)
+        output = self.import_catalog('ingredients', path, '--batch-size', '2')
+        self.assertIn('добавлено 0, обновлено 0, пропущено 6', output)
+
+    def test_updates_for_jsonl_and_json(self):
+        Tag.objects.create(name='Старое', slug='breakfast')
+        path = self.write('tags.jsonl', '\n'.join((
+            json.dumps({'name': 'Завтрак', 'slug': 'breakfast'}),
+            json.dumps({'name': 'Обед', 'slug': 'lunch'}),
+            'не json',
+        )))
+        output = self.import_catalog('tags', path)
+        self.assertIn('добавлено 1, обновлено 1, пропущено 1', output)
+        self.assertEqual(
+            Tag.objects.get(slug='breakfast').name, 'Завтрак'
+        )
+        path = self.write('tags.json', json.dumps([
+            {'name': 'Ужин', 'slug': 'dinner'},
+            {'name': 'Обед', 'slug': 'lunch'},
+            {'slug': 'brunch'},
+        ], ensure_ascii=False))
+        output = self.import_catalog('tags', path)
+        self.assertIn('добавлено 1, обновлено 0, пропущено 2', output)
+
+    def test_errors(self):
+        with self.assertRaises(CommandError):
+            self.import_catalog('tags', self.write('tags.txt', ''))
+        with self.assertRaises(CommandError):
+            self.import_catalog(
+                'tags', os.path.join(self.directory, 'missing.csv')
+            )
+        with self.assertRaises(CommandError):
+            self.import_catalog('tags', self.write('tags.json', '[{"a": '))
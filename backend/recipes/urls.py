@@ -1,9 +1,18 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, register_converter
 
-from recipes.views import decode_link
+from recipes.converters import IdConverter, ShortCodeConverter
+from recipes.views import async_decode_link, decode_link
 
 app_name = 'recipes'
 
+register_converter(ShortCodeConverter, 'short')
+register_converter(IdConverter, 'id')
+
+view = async_decode_link if settings.ASYNC_VIEWS else decode_link
+
 urlpatterns = [
-    path('s/<int:id>', decode_link, name='short_link')
+    path('r/<short:id>', view, name='short_link'),
+    # Ссылки, выданные до перехода на короткие коды.
+    path('s/<id:id>', view, name='legacy_short_link')
 ]
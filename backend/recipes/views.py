@@ -1,12 +1,46 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import redirect
-from rest_framework.exceptions import ValidationError
+from django.utils.cache import patch_cache_control
 
+from recipes.caches import TTLCache
 from recipes.models import Recipe
 
+recipe_ids = TTLCache(settings.SHORT_LINK_CACHE_SIZE)
 
-def decode_link(request, id):
-    if not Recipe.objects.filter(id=id).exists():
-        raise ValidationError(
-            f'Рецепта с id {id} не существует!'
+
+def recipe_exists(id):
+    # Короткие ссылки получают всплески трафика, поэтому проверка
+    # существования рецепта кешируется, в том числе отрицательная.
+    exists = recipe_ids.get(id)
+    if exists is None:
+        exists = Recipe.objects.filter(id=id).exists()
+        recipe_ids.set(
+            id, exists,
+            settings.SHORT_LINK_CACHE_TTL if exists
+            else settings.SHORT_LINK_NEGATIVE_TTL
         )
-    return redirect(f'/recipes/{id}')
+    return exists
+
+
+def link_redirect(id, exists):
+    if not exists:
+        raise Http404(f'Рецепта с id {id} не существует!')
+    response = redirect(f'/recipes/{id}')
+    patch_cache_control(
+        response, public=True, max_age=settings.SHORT_LINK_MAX_AGE
+    )
+    return response
+
+
+def decode_link(request, id):
+    return link_redirect(id, recipe_exists(id))
+
+
+async def async_decode_link(request, id):
+    # При попадании в кеш ответ собирается без перехода в поток.
+    exists = recipe_ids.get(id)
+    if exists is None:
+        exists = await sync_to_async(recipe_exists)(id)
+    return link_redirect(id, exists)